@@ -0,0 +1,356 @@
+"""Offline benchmark of File2prompt runs against a local stub Ollama server.
+
+Generates purchase-history input files of increasing size and runs them
+through two paths:
+
+- integration: the native run path (scheduler, runner, Ollama client and
+  helper update) inside a minimal Home Assistant instance.
+- script: the generated file2prompt.sh, pointed at the stub instead of
+  Ollama and Home Assistant.
+
+Each size and mode runs in a fresh worker process so peak RSS is measured
+per combination. Reported per combination: p50/p95 latency, throughput of
+input bytes at the median latency, peak RSS and the PIDs allocated per run.
+
+Usage, from the repository root in an environment with Home Assistant:
+
+    python benchmarks/run_benchmark.py --sizes 1K,1M,50M --iterations 5
+    python benchmarks/run_benchmark.py --stream --option large_input=true
+    python benchmarks/run_benchmark.py --json results.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+import urllib.request
+
+from stub_ollama import add_arguments, stub_from_arguments
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("integration", "script")
+DEFAULT_SIZES = "1K,100K,1M,10M,50M"
+DEFAULT_ITERATIONS = 5
+SCRIPT_TIMEOUT = 600  # seconds
+HELPER_ENTITY = "input_text.file2prompt_benchmark"
+MODEL = "llama3.2"
+SIZE_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def parse_size(value):
+    """Parse a size like 1K, 10M or 512 into bytes."""
+    value = value.strip().upper().rstrip("B")
+    if value and value[-1] in SIZE_UNITS:
+        return int(float(value[:-1]) * SIZE_UNITS[value[-1]])
+    return int(value)
+
+
+def format_size(size):
+    """Format bytes with the largest fitting unit."""
+    for unit in ("G", "M", "K"):
+        if size >= SIZE_UNITS[unit]:
+            return f"{size / SIZE_UNITS[unit]:g}{unit}B"
+    return f"{size}B"
+
+
+def parse_option(value):
+    """Parse a key=value entry option, decoding JSON values when possible."""
+    key, _, raw = value.partition("=")
+    try:
+        return key, json.loads(raw)
+    except ValueError:
+        return key, raw
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def last_pid():
+    """Return the last PID the kernel allocated, or None outside Linux."""
+    try:
+        with open("/proc/loadavg") as loadavg:
+            return int(loadavg.read().split()[-1])
+    except (OSError, ValueError):
+        return None
+
+
+def write_input_file(path, size):
+    """Write a JSON purchase history of roughly the given size, one record per line."""
+    rng = random.Random(size)
+    written = 2
+    with open(path, "w") as input_file:
+        input_file.write("[\n")
+        first = True
+        while written < size:
+            record = json.dumps({
+                "item": f"product{rng.randrange(500)}",
+                "date": f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+                "quantity": rng.randrange(1, 5),
+            })
+            line = record if first else ",\n" + record
+            input_file.write(line)
+            written += len(line)
+            first = False
+        input_file.write("\n]")
+
+
+def entry_data(args, input_path):
+    """Return the config entry data of the benchmarked entry."""
+    data = {
+        "ollama_ip": f"127.0.0.1:{args.port}",
+        "ollama_version": MODEL,
+        "ha_url": f"http://127.0.0.1:{args.port}",
+        "helper_entity": HELPER_ENTITY,
+        "ha_token": "benchmark",
+        "input_file": input_path,
+    }
+    data.update(dict(parse_option(option) for option in args.option))
+    return data
+
+
+async def _async_worker_integration(args, workdir):
+    """Time runs through the integration's scheduler and runner."""
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.file2prompt.backends import BackendPool
+    from custom_components.file2prompt.cache import ResultCache
+    from custom_components.file2prompt.const import NO_RESPONSE
+    from custom_components.file2prompt.incremental import IncrementalState
+    from custom_components.file2prompt.runner import File2promptRunner
+    from custom_components.file2prompt.scheduler import File2promptScheduler
+
+    hass = HomeAssistant(workdir)
+    await hass.async_start()
+    # The runner only reads these attributes, and the ConfigEntry constructor
+    # differs between Home Assistant releases
+    entry = SimpleNamespace(entry_id="benchmark", title="benchmark", data=entry_data(args, args.input))
+    pool = BackendPool(hass)
+    cache = ResultCache(hass, entry.entry_id)
+    incremental = IncrementalState(hass, entry.entry_id)
+    runner = File2promptRunner(hass, entry, cache, incremental, pool)
+    scheduler = File2promptScheduler(hass)
+    hass.states.async_set(HELPER_ENTITY, "")
+
+    async def async_run():
+        await scheduler.async_submit(runner)
+        return hass.states.get(HELPER_ENTITY).state != NO_RESPONSE
+
+    try:
+        return await _async_measure(args, async_run)
+    finally:
+        await hass.async_stop()
+
+
+def generate_script(args, input_path, directory):
+    """Write the generated file2prompt.sh for an input file, pointed at the stub."""
+    from custom_components.file2prompt.config_flow import File2promptConfigFlow
+
+    data = entry_data(args, input_path)
+    script = File2promptConfigFlow._generate_script(
+        None,
+        "127.0.0.1",
+        data["ollama_version"],
+        data["ha_url"],
+        data["helper_entity"],
+        data["ha_token"],
+        input_file=input_path,
+    )
+    # Point the fixed Ollama port and log directory at the benchmark
+    script = script.replace(":11434/", f":{args.port}/").replace("/config/www/", f"{directory}/")
+    script_path = os.path.join(directory, f"file2prompt_{os.path.basename(input_path)}.sh")
+    with open(script_path, "w") as script_file:
+        script_file.write(script)
+    return script_path
+
+
+async def _async_worker_script(args):
+    """Time runs of the generated shell script."""
+    state_url = f"http://127.0.0.1:{args.port}/api/states/{HELPER_ENTITY}"
+
+    def run():
+        subprocess.run(["bash", args.script], check=False, timeout=SCRIPT_TIMEOUT)
+        with urllib.request.urlopen(state_url) as response:
+            state = json.load(response)["state"]
+        return state != "No response received from Ollama."
+
+    async def async_run():
+        return await asyncio.get_running_loop().run_in_executor(None, run)
+
+    # A forked child starts with the RSS of this worker, which is the
+    # lowest peak the script can report
+    await asyncio.get_running_loop().run_in_executor(None, subprocess.run, ["true"])
+    rss_floor = max_rss(resource.RUSAGE_CHILDREN)
+    result = await _async_measure(args, async_run)
+    result["rss_floor"] = rss_floor
+    return result
+
+
+async def _async_measure(args, async_run):
+    """Run once to warm up, then time the iterations."""
+    await async_run()
+    latencies = []
+    failures = 0
+    first_pid = last_pid()
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        if not await async_run():
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+    pids = last_pid()
+    return {
+        "latencies": latencies,
+        "failures": failures,
+        "pids_per_run": None if first_pid is None else (pids - first_pid) / args.iterations,
+    }
+
+
+def max_rss(who):
+    """Return the peak RSS in bytes; ru_maxrss is in kilobytes on Linux and bytes on macOS."""
+    peak_rss = resource.getrusage(who).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def worker(args):
+    """Benchmark one mode and input file, printing the results as JSON."""
+    if args.worker == "integration":
+        with tempfile.TemporaryDirectory() as workdir:
+            result = asyncio.run(_async_worker_integration(args, workdir))
+        result["peak_rss"] = max_rss(resource.RUSAGE_SELF)
+        result["rss_floor"] = 0
+    else:
+        result = asyncio.run(_async_worker_script(args))
+        result["peak_rss"] = max_rss(resource.RUSAGE_CHILDREN)
+    print(json.dumps(result))
+
+
+async def _async_run_worker(args, mode, input_path, script_path=None):
+    """Run a worker process and return its results."""
+    command = [
+        sys.executable, os.path.abspath(__file__),
+        "--worker", mode,
+        "--input", input_path,
+        "--script", script_path or "",
+        "--port", str(args.port),
+        "--iterations", str(args.iterations),
+    ]
+    for option in args.option:
+        command += ["--option", option]
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode:
+        lines = stderr.decode(errors="replace").strip().splitlines()
+        return {"error": lines[-1] if lines else f"worker exited with {process.returncode}"}
+    return json.loads(stdout.decode().strip().splitlines()[-1])
+
+
+def summarize(mode, size, result):
+    """Turn worker results into a report row."""
+    if "error" in result:
+        return {"mode": mode, "size": size, "error": result["error"]}
+    latencies = result["latencies"]
+    p50 = percentile(latencies, 0.5)
+    return {
+        "mode": mode,
+        "size": size,
+        "runs": len(latencies),
+        "failures": result["failures"],
+        "p50": p50,
+        "p95": percentile(latencies, 0.95),
+        "throughput": size / p50 if p50 else None,
+        "peak_rss": result["peak_rss"],
+        "rss_floor": result["rss_floor"],
+        "pids_per_run": result["pids_per_run"],
+    }
+
+
+def print_report(rows):
+    """Print the results as a table."""
+    header = f"{'mode':<12}{'size':>8}{'runs':>6}{'failed':>8}{'p50 s':>9}{'p95 s':>9}{'MB/s':>9}{'RSS MB':>9}{'PIDs/run':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if "error" in row:
+            print(f"{row['mode']:<12}{format_size(row['size']):>8}  {row['error']}")
+            continue
+        pids = "-" if row["pids_per_run"] is None else f"{row['pids_per_run']:.1f}"
+        rss = f"{row['peak_rss'] / (1 << 20):.1f}"
+        if row["peak_rss"] <= row["rss_floor"]:
+            rss = "<" + rss
+        print(
+            f"{row['mode']:<12}{format_size(row['size']):>8}{row['runs']:>6}{row['failures']:>8}"
+            f"{row['p50']:>9.3f}{row['p95']:>9.3f}{row['throughput'] / (1 << 20):>9.1f}"
+            f"{rss:>9}{pids:>10}"
+        )
+
+
+async def _async_main(args):
+    """Start the stub, run every combination and report."""
+    stub = stub_from_arguments(args)
+    args.port = await stub.async_start(port=args.port)
+    modes = [mode.strip() for mode in args.modes.split(",")]
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as inputs:
+            for size in (parse_size(value) for value in args.sizes.split(",")):
+                input_path = os.path.join(inputs, f"input_{size}.json")
+                write_input_file(input_path, size)
+                script_path = generate_script(args, input_path, inputs) if "script" in modes else None
+                for mode in modes:
+                    result = await _async_run_worker(args, mode, input_path, script_path)
+                    rows.append(summarize(mode, size, result))
+    finally:
+        await stub.async_stop()
+
+    print_report(rows)
+    print(f"\nStub received {stub.requests} generate requests, {format_size(stub.bytes_received)} in total")
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"arguments": vars(args), "results": rows}, output, indent=2)
+
+
+def main():
+    """Parse the arguments and run the benchmark or a worker."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated input sizes, e.g. 1K,10M")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes: integration, script")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Timed runs per size and mode")
+    parser.add_argument("--port", type=int, default=0, help="Port of the stub, random by default")
+    parser.add_argument("--stream", action="store_true", help="Enable streaming in the integration")
+    parser.add_argument(
+        "--option",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Extra entry option for the integration, e.g. large_input=true",
+    )
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--script", help=argparse.SUPPRESS)
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.stream:
+        args.option.append("stream=true")
+
+    sys.path.insert(0, REPO_ROOT)
+    if args.worker:
+        worker(args)
+    else:
+        asyncio.run(_async_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Local stand-in for an Ollama server and the Home Assistant states API.
+
+Answers /api/generate (streaming and non-streaming), /api/tags and
+/api/states/<entity_id> so File2prompt runs can be benchmarked without
+a model or a Home Assistant instance. Time to first token and the token rate
+are configurable. Like Ollama, the stub streams NDJSON unless the request sets
+"stream" to false, and it always reads the complete request body.
+
+Run it on its own with:
+
+    python benchmarks/stub_ollama.py --port 11434 --latency 0.2 --tokens-per-second 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+DEFAULT_LATENCY = 0.05  # seconds before the first token
+DEFAULT_TOKENS_PER_SECOND = 200
+DEFAULT_RESPONSE_TOKENS = 20
+
+# Ollama accepts arbitrarily large prompts, the aiohttp default is 1 MB
+MAX_BODY_SIZE = 1 << 30
+
+
+def dumps(data):
+    """Serialize like Ollama does, without spaces; the generated script greps for '"response":"'."""
+    return json.dumps(data, separators=(",", ":"))
+
+
+class StubOllama:
+    """A configurable fake Ollama server."""
+
+    def __init__(
+        self,
+        latency=DEFAULT_LATENCY,
+        tokens_per_second=DEFAULT_TOKENS_PER_SECOND,
+        response_tokens=DEFAULT_RESPONSE_TOKENS,
+    ):
+        """Initialize the stub."""
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.requests = 0
+        self.bytes_received = 0
+        self.states = {}
+        self._runner = None
+
+    def _tokens(self):
+        """Return the tokens of an answer."""
+        return [f"item{index}, " for index in range(self.response_tokens)]
+
+    def _timings(self, prompt_bytes, started):
+        """Return the timing fields Ollama adds to the last chunk, in nanoseconds."""
+        eval_duration = int(self.response_tokens / self.tokens_per_second * 1e9)
+        return {
+            "total_duration": int((time.monotonic() - started) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": prompt_bytes // 4,
+            "prompt_eval_duration": int(self.latency * 1e9),
+            "eval_count": self.response_tokens,
+            "eval_duration": eval_duration,
+        }
+
+    async def _async_generate(self, request):
+        """Answer a generate request."""
+        started = time.monotonic()
+        body = await request.read()
+        self.requests += 1
+        self.bytes_received += len(body)
+        payload = json.loads(body)
+        model = payload.get("model", "")
+
+        # A warm-up request without a prompt only loads the model
+        if "prompt" not in payload:
+            return web.json_response({"model": model, "response": "", "done": True}, dumps=dumps)
+
+        tokens = self._tokens()
+        await asyncio.sleep(self.latency)
+
+        if not payload.get("stream", True):
+            await asyncio.sleep(len(tokens) / self.tokens_per_second)
+            return web.json_response({
+                "model": model,
+                "response": "".join(tokens).rstrip(", "),
+                "done": True,
+                **self._timings(len(body), started),
+            }, dumps=dumps)
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        for token in tokens:
+            chunk = {"model": model, "response": token, "done": False}
+            await response.write(dumps(chunk).encode("utf-8") + b"\n")
+            await asyncio.sleep(1 / self.tokens_per_second)
+        last = {"model": model, "response": "", "done": True, **self._timings(len(body), started)}
+        await response.write(dumps(last).encode("utf-8") + b"\n")
+        await response.write_eof()
+        return response
+
+    async def _async_tags(self, request):
+        """List the models, used as health check."""
+        return web.json_response({"models": [{"name": "llama3.2"}]})
+
+    async def _async_set_state(self, request):
+        """Store a state posted by the generated script."""
+        entity_id = request.match_info["entity_id"]
+        self.states[entity_id] = await request.json()
+        return web.json_response(self.states[entity_id], status=201)
+
+    async def _async_get_state(self, request):
+        """Return a state posted by the generated script."""
+        entity_id = request.match_info["entity_id"]
+        if entity_id not in self.states:
+            return web.json_response({"message": "Entity not found."}, status=404)
+        return web.json_response(self.states[entity_id])
+
+    async def async_start(self, host="127.0.0.1", port=0):
+        """Start serving, returning the bound port."""
+        app = web.Application(client_max_size=MAX_BODY_SIZE)
+        app.router.add_post("/api/generate", self._async_generate)
+        app.router.add_get("/api/tags", self._async_tags)
+        app.router.add_post("/api/states/{entity_id}", self._async_set_state)
+        app.router.add_get("/api/states/{entity_id}", self._async_get_state)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return self._runner.addresses[0][1]
+
+    async def async_stop(self):
+        """Stop serving."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def add_arguments(parser):
+    """Add the stub options to an argument parser."""
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULT_TOKENS_PER_SECOND, help="Token generation rate")
+    parser.add_argument("--response-tokens", type=int, default=DEFAULT_RESPONSE_TOKENS, help="Tokens per answer")
+
+
+def stub_from_arguments(args):
+    """Create a stub from parsed arguments."""
+    return StubOllama(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+    )
+
+
+async def _async_main(args):
+    """Serve until interrupted."""
+    stub = stub_from_arguments(args)
+    port = await stub.async_start(args.host, args.port)
+    print(f"Stub Ollama listening on http://{args.host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stub.async_stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    add_arguments(parser)
+    try:
+        asyncio.run(_async_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -1,8 +1,16 @@
 """The File2prompt integration."""
+import asyncio
 import os
 import logging
+import time
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.start import async_at_started
 
 from .const import (
     DOMAIN,
@@ -13,18 +21,271 @@ from .const import (
     CONF_HA_TOKEN,
     CONF_PROMPT,
     CONF_INPUT_FILE,
+    CONF_WATCH,
+    CONF_WATCH_DEBOUNCE,
+    CONF_WARMUP,
+    CONF_WARMUP_TIMES,
+    CONF_RESULT_HISTORY,
+    DEFAULT_WARMUP,
+    DEFAULT_WARMUP_TIMES,
+    DEFAULT_INPUT_FILE,
+    DEFAULT_WATCH,
+    DEFAULT_WATCH_DEBOUNCE,
+    DEFAULT_RESULT_HISTORY,
     SCRIPT_FILENAME,
     SCRIPT_PATH,
+    SERVICE_RUN,
+    SERVICE_BATCH,
+    SERVICE_SET_TEMPLATE,
+    SERVICE_REMOVE_TEMPLATE,
+    SERVICE_CANCEL,
+    CONF_SOURCE,
+    DEFAULT_SOURCE,
+    SOURCE_RECORDER,
+    ATTR_ENTRY_ID,
+    ATTR_PRIORITY,
+    ATTR_JOBS,
+    ATTR_MAX_PARALLEL,
+    ATTR_NAME,
+    ATTR_TEMPLATE,
+    EVENT_BATCH_RESULT,
+    DATA_SCHEDULER,
+    DATA_BACKENDS,
+    DATA_TEMPLATES,
+    PLATFORMS,
 )
+from .backends import BackendPool
+from .cache import ResultCache
+from .config_flow import parse_warmup_times, validate_input_file
+from .incremental import IncrementalState
+from .prefix import PrefixState
+from .results import ResultHistory
+from .retrieval import RetrievalIndex
+from .runner import File2promptRunner, File2promptJobRunner
+from .scheduler import File2promptScheduler
+from .templates import PromptTemplates
+from .watcher import InputFileWatcher
 
 _LOGGER = logging.getLogger(__name__)
 
+RUN_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_PRIORITY, default=0): vol.Coerce(int),
+    }
+)
+
+def _job_input_file(value):
+    """Accept only input files inside /config/, like the entries' own input files."""
+    value = cv.string(value).strip()
+    if not validate_input_file(value):
+        raise vol.Invalid(f"{value} is not a file inside /config/")
+    return value
+
+
+JOB_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_INPUT_FILE): _job_input_file,
+        vol.Optional(CONF_PROMPT): cv.string,
+        vol.Optional(CONF_HELPER_ENTITY): cv.entity_id,
+    }
+)
+
+BATCH_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Required(ATTR_JOBS): vol.All(cv.ensure_list, [JOB_SCHEMA]),
+        vol.Optional(ATTR_MAX_PARALLEL): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+SET_TEMPLATE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_NAME): cv.string,
+        vol.Required(ATTR_TEMPLATE): cv.template,
+    }
+)
+
+CANCEL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+    }
+)
+
+REMOVE_TEMPLATE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_NAME): cv.string,
+    }
+)
+
+
+def _get_runners(hass: HomeAssistant, call: ServiceCall):
+    """Return the runners targeted by a service call."""
+    runners = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_ENTRY_ID)
+    if entry_id is None:
+        return list(runners.values())
+    if entry_id not in runners:
+        raise HomeAssistantError(f"Unknown File2prompt entry: {entry_id}")
+    return [runners[entry_id]]
+
+
+def _async_register_services(hass: HomeAssistant):
+    """Register the integration services once."""
+    if hass.services.has_service(DOMAIN, SERVICE_RUN):
+        return
+
+    async def async_handle_run(call: ServiceCall):
+        """Run one or all File2prompt entries in-process."""
+        scheduler = hass.data[DATA_SCHEDULER]
+        await asyncio.gather(
+            *(
+                scheduler.async_submit(runner, call.data[ATTR_PRIORITY])
+                for runner in _get_runners(hass, call)
+            )
+        )
+
+    async def async_handle_batch(call: ServiceCall):
+        """Run a list of jobs concurrently with one entry's server and model."""
+        runners = _get_runners(hass, call)
+        if len(runners) != 1:
+            raise HomeAssistantError(
+                "Set entry_id to choose the File2prompt entry whose Ollama server and model the batch uses"
+            )
+        runner = runners[0]
+        scheduler = hass.data[DATA_SCHEDULER]
+        jobs = call.data[ATTR_JOBS]
+        # The scheduler's per-server slots limit the jobs like runs,
+        # max_parallel can only lower that
+        semaphore = asyncio.Semaphore(call.data.get(ATTR_MAX_PARALLEL, len(jobs) or 1))
+        start = time.monotonic()
+
+        async def async_run_job(job):
+            async with semaphore:
+                job_runner = File2promptJobRunner(
+                    runner,
+                    job[CONF_INPUT_FILE],
+                    job.get(CONF_PROMPT),
+                    job.get(CONF_HELPER_ENTITY),
+                )
+                return {
+                    CONF_INPUT_FILE: job[CONF_INPUT_FILE],
+                    CONF_HELPER_ENTITY: job.get(CONF_HELPER_ENTITY),
+                    "response": await scheduler.async_submit_job(job_runner),
+                }
+
+        _LOGGER.debug(f"Running a batch of {len(jobs)} jobs")
+        results = await asyncio.gather(*(async_run_job(job) for job in jobs))
+        hass.bus.async_fire(
+            EVENT_BATCH_RESULT,
+            {
+                "entry_id": runner.entry.entry_id,
+                "results": results,
+                "duration": round(time.monotonic() - start, 3),
+            },
+        )
+
+    async def async_handle_cancel(call: ServiceCall):
+        """Cancel the queued or running run of one or all File2prompt entries."""
+        scheduler = hass.data[DATA_SCHEDULER]
+        for runner in _get_runners(hass, call):
+            if not scheduler.async_cancel(runner):
+                _LOGGER.debug(f"No run of {runner.entry.entry_id} to cancel")
+
+    async def async_handle_set_template(call: ServiceCall):
+        """Add or replace a shared prompt template."""
+        await hass.data[DATA_TEMPLATES].async_set(call.data[ATTR_NAME], call.data[ATTR_TEMPLATE].template)
+
+    async def async_handle_remove_template(call: ServiceCall):
+        """Delete a shared prompt template."""
+        await hass.data[DATA_TEMPLATES].async_remove(call.data[ATTR_NAME])
+
+    hass.services.async_register(DOMAIN, SERVICE_RUN, async_handle_run, schema=RUN_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_BATCH, async_handle_batch, schema=BATCH_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_CANCEL, async_handle_cancel, schema=CANCEL_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_TEMPLATE, async_handle_set_template, schema=SET_TEMPLATE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_REMOVE_TEMPLATE, async_handle_remove_template, schema=REMOVE_TEMPLATE_SCHEMA
+    )
+
+
+def _async_setup_warmup(hass: HomeAssistant, entry: ConfigEntry, runner):
+    """Pre-load the model at startup and at the configured times."""
+
+    async def async_warm_up(*_):
+        await runner.async_warm_up()
+
+    if entry.data.get(CONF_WARMUP, DEFAULT_WARMUP):
+        entry.async_on_unload(async_at_started(hass, async_warm_up))
+
+    for warmup_time in parse_warmup_times(entry.data.get(CONF_WARMUP_TIMES, DEFAULT_WARMUP_TIMES)) or []:
+        entry.async_on_unload(
+            async_track_time_change(
+                hass,
+                async_warm_up,
+                hour=warmup_time.hour,
+                minute=warmup_time.minute,
+                second=warmup_time.second,
+            )
+        )
+
+
+async def _async_setup_watch(hass: HomeAssistant, entry: ConfigEntry, runner):
+    """Run the entry whenever its input file changes."""
+    if not entry.data.get(CONF_WATCH, DEFAULT_WATCH):
+        return
+    if entry.data.get(CONF_SOURCE, DEFAULT_SOURCE) == SOURCE_RECORDER:
+        _LOGGER.warning(f"{entry.title} reads from the recorder, not watching its input file")
+        return
+
+    async def async_run():
+        await hass.data[DATA_SCHEDULER].async_submit(runner, follow_up=True)
+
+    watcher = InputFileWatcher(
+        hass,
+        entry.data.get(CONF_INPUT_FILE, DEFAULT_INPUT_FILE),
+        entry.data.get(CONF_WATCH_DEBOUNCE, DEFAULT_WATCH_DEBOUNCE),
+        async_run,
+    )
+    await watcher.async_start()
+    entry.async_on_unload(lambda: hass.async_create_task(watcher.async_stop()))
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its configuration changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up File2prompt from a config entry."""
-    # Store the entry data in hass.data
+    # Store the entry runner in hass.data
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = entry.data
+    hass.data.setdefault(DATA_SCHEDULER, File2promptScheduler(hass))
+    if DATA_BACKENDS not in hass.data:
+        hass.data[DATA_BACKENDS] = BackendPool(hass)
+        hass.data[DATA_BACKENDS].async_start()
+    if DATA_TEMPLATES not in hass.data:
+        templates = PromptTemplates(hass)
+        await templates.async_load()
+        hass.data.setdefault(DATA_TEMPLATES, templates)
+    cache = ResultCache(hass, entry.entry_id)
+    await cache.async_load()
+    incremental = IncrementalState(hass, entry.entry_id)
+    await incremental.async_load()
+    results = ResultHistory(
+        hass, entry.entry_id, entry.data.get(CONF_RESULT_HISTORY, DEFAULT_RESULT_HISTORY)
+    )
+    await results.async_load()
+    # The retrieval index is only read from disk when a run needs it
+    index = RetrievalIndex(hass, entry.entry_id)
+    prefix = PrefixState(hass, entry.entry_id)
+    await prefix.async_load()
+    runner = File2promptRunner(
+        hass, entry, cache, incremental, hass.data[DATA_BACKENDS], results, index, prefix
+    )
+    hass.data[DOMAIN][entry.entry_id] = runner
     
     # Create the script path if it doesn't exist
     os.makedirs(SCRIPT_PATH, exist_ok=True)
@@ -36,20 +297,54 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.info("Made File2prompt script executable")
     else:
         _LOGGER.warning("Script file not found at %s", script_path)
+
+    # Set up the telemetry sensors
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # Register the native run service
+    _async_register_services(hass)
+
+    # Keep the model loaded ahead of runs
+    _async_setup_warmup(hass, entry, runner)
+
+    # Run automatically when the input file changes
+    await _async_setup_watch(hass, entry, runner)
+
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
     
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+
     # Remove the entry data from hass.data
     if DOMAIN in hass.data and entry.entry_id in hass.data[DOMAIN]:
         hass.data[DOMAIN].pop(entry.entry_id)
+        # Stop probing the servers that only this entry used
+        hass.data[DATA_BACKENDS].prune(
+            address for runner in hass.data[DOMAIN].values() for address in runner.backends
+        )
         
         # If this was the last entry, remove the domain data too
         if not hass.data[DOMAIN]:
             hass.data.pop(DOMAIN)
+            hass.data.pop(DATA_SCHEDULER, None)
+            hass.data.pop(DATA_BACKENDS).async_stop()
+            hass.data.pop(DATA_TEMPLATES).async_stop()
+            hass.services.async_remove(DOMAIN, SERVICE_RUN)
+            hass.services.async_remove(DOMAIN, SERVICE_BATCH)
+            hass.services.async_remove(DOMAIN, SERVICE_CANCEL)
+            hass.services.async_remove(DOMAIN, SERVICE_SET_TEMPLATE)
+            hass.services.async_remove(DOMAIN, SERVICE_REMOVE_TEMPLATE)
     
+    return True
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the script and persisted data when a config entry is deleted."""
     # Remove the generated script file when integration is removed
     script_path = os.path.join(SCRIPT_PATH, SCRIPT_FILENAME)
     if os.path.exists(script_path):
@@ -58,5 +353,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             _LOGGER.info(f"Removed script file: {script_path}")
         except Exception as e:
             _LOGGER.error(f"Failed to remove script file: {e}")
-            
-    return True
\ No newline at end of file
+
+    await ResultCache(hass, entry.entry_id).async_remove()
+    await IncrementalState(hass, entry.entry_id).async_remove()
+    await ResultHistory(hass, entry.entry_id).async_remove()
+    await RetrievalIndex(hass, entry.entry_id).async_remove()
+    await PrefixState(hass, entry.entry_id).async_remove()
@@ -0,0 +1,162 @@
+"""Health checks and routing over multiple Ollama servers."""
+import asyncio
+from datetime import timedelta
+import logging
+import time
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    OLLAMA_PORT,
+    OLLAMA_TAGS_PATH,
+    HEALTH_CHECK_INTERVAL,
+    HEALTH_CHECK_TIMEOUT,
+    LATENCY_SMOOTHING,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_backend(address):
+    """Split an "ip", "ip:port" or "[ipv6]:port" address into host and port.
+
+    A bare IPv6 address uses the default port. Raises ValueError for an
+    invalid port.
+    """
+    address = address.strip()
+    if address.startswith("["):
+        host, _, port = address[1:].partition("]")
+        if not port:
+            return host, OLLAMA_PORT
+        if not port.startswith(":"):
+            raise ValueError(f"Invalid address: {address}")
+        return host, int(port[1:])
+    if address.count(":") == 1:
+        host, port = address.split(":")
+        return host, int(port)
+    return address, OLLAMA_PORT
+
+
+def format_backend(host, port):
+    """Join a host and port into an address, bracketing IPv6 hosts."""
+    if ":" in host:
+        return f"[{host}]:{port}"
+    return f"{host}:{port}"
+
+
+class Backend:
+    """Health and load of one Ollama server."""
+
+    def __init__(self, host, port):
+        """Initialize the backend."""
+        self.host = host
+        self.port = port
+        self.healthy = True
+        self.latency = None
+        self.in_flight = 0
+
+    @property
+    def address(self):
+        """Return the normalised host:port address of the server."""
+        return format_backend(self.host, self.port)
+
+    @property
+    def base_url(self):
+        """Return the base URL of the server."""
+        return f"http://{self.address}"
+
+    def record_latency(self, latency):
+        """Fold a new probe latency into the moving average."""
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+
+
+class BackendPool:
+    """Track every Ollama server used by the integration and probe it periodically."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the pool."""
+        self.hass = hass
+        self._backends = {}
+        self._unsub = None
+
+    def async_start(self):
+        """Start the periodic health probes."""
+        self._unsub = async_track_time_interval(
+            self.hass, self.async_probe, timedelta(seconds=HEALTH_CHECK_INTERVAL)
+        )
+
+    def async_stop(self):
+        """Stop the periodic health probes."""
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+
+    def get(self, address):
+        """Return the backend for an address, tracking it from now on."""
+        host, port = parse_backend(address)
+        key = format_backend(host, port)
+        if key not in self._backends:
+            self._backends[key] = Backend(host, port)
+        return self._backends[key]
+
+    def prune(self, addresses):
+        """Stop tracking the backends that are not in the given addresses."""
+        keep = {format_backend(*parse_backend(address)) for address in addresses}
+        for key in [key for key in self._backends if key not in keep]:
+            _LOGGER.debug(f"No entry uses Ollama server {key} any more")
+            del self._backends[key]
+
+    def select(self, addresses, preferred=None):
+        """Order the backends of an entry by preference.
+
+        Healthy backends come first, the preferred address (e.g. the server
+        that has the prompt prefix cached) and then the least busy and the
+        fastest responding one before the others.
+        """
+        backends = [self.get(address) for address in addresses]
+        preferred = next(
+            (backend for backend in backends if backend.address == preferred), None
+        )
+        return sorted(
+            backends,
+            key=lambda backend: (
+                not backend.healthy,
+                backend is not preferred,
+                backend.in_flight,
+                backend.latency if backend.latency is not None else float("inf"),
+            ),
+        )
+
+    def mark_failed(self, backend):
+        """Take a backend out of rotation until its next successful probe."""
+        if backend.healthy:
+            _LOGGER.warning(f"Ollama server {backend.base_url} failed, routing to other servers")
+        backend.healthy = False
+
+    async def async_probe(self, *_):
+        """Probe every known backend's /api/tags endpoint."""
+        await asyncio.gather(*(self._async_probe(backend) for backend in self._backends.values()))
+
+    async def _async_probe(self, backend):
+        """Probe one backend and update its health and latency."""
+        session = async_get_clientsession(self.hass)
+        start = time.monotonic()
+        try:
+            async with session.get(
+                f"{backend.base_url}{OLLAMA_TAGS_PATH}",
+                timeout=aiohttp.ClientTimeout(total=HEALTH_CHECK_TIMEOUT),
+            ) as response:
+                response.raise_for_status()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _LOGGER.debug(f"Health check of {backend.base_url} failed: {e}")
+            backend.healthy = False
+            return
+        backend.record_latency(time.monotonic() - start)
+        backend.healthy = True
@@ -0,0 +1,99 @@
+"""Persistent result cache for the File2prompt integration."""
+from collections import OrderedDict
+import hashlib
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    CACHE_MAX_ENTRIES,
+    CACHE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def cache_key(*parts):
+    """Return a content hash over the given strings."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = str(part).encode("utf-8")
+        # Length prefix so ("ab", "c") and ("a", "bc") hash differently
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    """Return the SHA-256 of a file, or None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as input_file:
+            for block in iter(lambda: input_file.read(1 << 16), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of Ollama answers, persisted under .storage."""
+
+    def __init__(self, hass: HomeAssistant, entry_id, max_entries=CACHE_MAX_ENTRIES):
+        """Initialize the cache."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.cache.{entry_id}")
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    async def async_load(self):
+        """Load cached results and counters from storage."""
+        data = await self._store.async_load() or {}
+        self._entries = OrderedDict(
+            (item["key"], item) for item in data.get("entries", [])
+        )
+        self.hits = data.get("hits", 0)
+        self.misses = data.get("misses", 0)
+
+    async def async_remove(self):
+        """Delete the persisted cache."""
+        await self._store.async_remove()
+
+    def get(self, key, ttl):
+        """Return the cached response for a key, or None on a miss.
+
+        A ttl of 0 disables expiry.
+        """
+        item = self._entries.get(key)
+        if item is not None and ttl and time.time() - item["created"] > ttl:
+            del self._entries[key]
+            item = None
+
+        if item is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        self._store.async_delay_save(self._data_to_save, CACHE_SAVE_DELAY)
+        return item["response"] if item else None
+
+    def set(self, key, response):
+        """Store a response, evicting the least recently used entries."""
+        self._entries[key] = {"key": key, "response": response, "created": time.time()}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        self._store.async_delay_save(self._data_to_save, CACHE_SAVE_DELAY)
+
+    def _data_to_save(self):
+        """Return the data to persist."""
+        return {
+            "entries": list(self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,58 @@
+"""Split input files into context-sized chunks on record boundaries."""
+import json
+
+
+def load_json_records(content):
+    """Return the records of a JSON array (or an object holding a single array).
+
+    Returns None when the content is not such a JSON document.
+    """
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return None
+
+    if isinstance(data, dict):
+        lists = [value for value in data.values() if isinstance(value, list)]
+        if len(lists) == 1:
+            data = lists[0]
+
+    return data if isinstance(data, list) else None
+
+
+def dump_record(record):
+    """Serialize a record as compact JSON."""
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def split_records(content):
+    """Split file content into records.
+
+    A JSON array (or an object holding a single array) yields its elements,
+    anything else yields its non-empty lines.
+    """
+    records = load_json_records(content)
+    if records is not None:
+        return [dump_record(record) for record in records]
+
+    return [line.strip() for line in content.splitlines() if line.strip()]
+
+
+def chunk_records(records, max_chars):
+    """Group records into chunks of at most max_chars characters.
+
+    A single record larger than max_chars becomes a chunk of its own.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for record in records:
+        if current and size + len(record) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current = []
+            size = 0
+        current.append(record)
+        size += len(record) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
@@ -1,4 +1,5 @@
 """Config flow for File2prompt integration."""
+import json
 import os
 import re
 import logging
@@ -10,6 +11,7 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import selector
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.template import Template
+import homeassistant.util.dt as dt_util
 
 
 def ensure_single_line(prompt):
@@ -20,6 +22,89 @@ def ensure_single_line(prompt):
     return " ".join(line.strip() for line in prompt.splitlines())
 
 
+def validate_backends(value):
+    """Return True if value is a comma separated list of ip, ip:port or [ipv6]:port addresses."""
+    for address in value.split(","):
+        if not address.strip():
+            continue
+        try:
+            host, port = parse_backend(address)
+            ipaddress.ip_address(host)
+            if not 0 < port < 65536:
+                return False
+        except ValueError:
+            return False
+    return True
+
+
+def validate_input_file(value):
+    """Return True if value is a path inside the /config/ directory."""
+    return os.path.normpath(value).startswith("/config/")
+
+
+def parse_warmup_times(value):
+    """Parse a comma separated list of HH:MM times, returning None if one is invalid."""
+    times = []
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        parsed = dt_util.parse_time(part.strip())
+        if parsed is None:
+            return None
+        times.append(parsed)
+    return times
+
+
+# Shorthand type names accepted in a structured output format
+FORMAT_TYPES = {
+    "str": "string",
+    "string": "string",
+    "int": "integer",
+    "integer": "integer",
+    "float": "number",
+    "number": "number",
+    "bool": "boolean",
+    "boolean": "boolean",
+}
+
+
+def _format_schema(value):
+    """Convert a shorthand like {"missing": [str]} to a JSON schema."""
+    if isinstance(value, str) and value in FORMAT_TYPES:
+        return {"type": FORMAT_TYPES[value]}
+    if isinstance(value, list) and len(value) == 1:
+        return {"type": "array", "items": _format_schema(value[0])}
+    if isinstance(value, dict) and value:
+        return {
+            "type": "object",
+            "properties": {key: _format_schema(item) for key, item in value.items()},
+            "required": list(value),
+        }
+    raise ValueError(f"Unsupported format type: {value}")
+
+
+def parse_format(value):
+    """Parse the structured output option into Ollama's format parameter.
+
+    Accepts "json", a JSON schema, or a shorthand like {"missing": [str]}.
+    Returns None when the option is empty and raises ValueError when invalid.
+    """
+    value = value.strip()
+    if not value:
+        return None
+    if value == "json":
+        return value
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        # Allow bare type names as in {"missing": [str]}
+        parsed = json.loads(re.sub(r'(?<!")\b(str|int|float|bool)\b(?!")', r'"\1"', value))
+    if isinstance(parsed, dict) and parsed.get("type") in ("object", "array"):
+        return parsed
+    return _format_schema(parsed)
+
+
+from .backends import parse_backend
 from .const import (
     DOMAIN,
     CONF_OLLAMA_IP,
@@ -31,15 +116,103 @@ from .const import (
     CONF_RESET_PROMPT,
     CONF_INPUT_FILE,
     CONF_CREATE_FILE,
+    CONF_STREAM,
+    CONF_CACHE,
+    CONF_CACHE_TTL,
+    CONF_CHUNKED,
+    CONF_CHUNK_TOKENS,
+    CONF_MAX_PARALLEL,
+    CONF_INCREMENTAL,
+    CONF_ENCODERS,
+    CONF_DROP_FIELDS,
+    CONF_KEEP_ALIVE,
+    CONF_WARMUP,
+    CONF_WARMUP_TIMES,
+    CONF_HOST_CONCURRENCY,
+    CONF_BACKENDS,
+    CONF_WATCH,
+    CONF_WATCH_DEBOUNCE,
+    CONF_LARGE_INPUT,
+    CONF_NUM_PREDICT,
+    CONF_FIT_HELPER,
+    CONF_STOP,
+    CONF_FORMAT,
+    CONF_RESULT_HISTORY,
+    CONF_PROMPT_TEMPLATE,
+    CONF_RETRIEVAL,
+    CONF_EMBED_MODEL,
+    CONF_TOP_K,
+    CONF_RECENT_RECORDS,
+    CONF_CASCADE,
+    CONF_CASCADE_VALIDATORS,
+    CONF_CONNECT_TIMEOUT,
+    CONF_FIRST_TOKEN_TIMEOUT,
+    CONF_DEADLINE,
+    CONF_PREFIX_CACHE,
+    CONF_SOURCE,
+    CONF_ENTITY_IDS,
+    CONF_HISTORY_HOURS,
     DEFAULT_OLLAMA_VERSION,
     DEFAULT_PROMPT,
     DEFAULT_INPUT_FILE,
+    DEFAULT_STREAM,
+    DEFAULT_CACHE,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_CHUNKED,
+    DEFAULT_CHUNK_TOKENS,
+    DEFAULT_MAX_PARALLEL,
+    DEFAULT_INCREMENTAL,
+    DEFAULT_ENCODERS,
+    DEFAULT_DROP_FIELDS,
+    DEFAULT_KEEP_ALIVE,
+    DEFAULT_WARMUP,
+    DEFAULT_WARMUP_TIMES,
+    DEFAULT_HOST_CONCURRENCY,
+    DEFAULT_BACKENDS,
+    DEFAULT_WATCH,
+    DEFAULT_WATCH_DEBOUNCE,
+    DEFAULT_LARGE_INPUT,
+    DEFAULT_NUM_PREDICT,
+    DEFAULT_FIT_HELPER,
+    DEFAULT_STOP,
+    DEFAULT_FORMAT,
+    DEFAULT_RESULT_HISTORY,
+    DEFAULT_PROMPT_TEMPLATE,
+    DEFAULT_RETRIEVAL,
+    DEFAULT_EMBED_MODEL,
+    DEFAULT_TOP_K,
+    DEFAULT_RECENT_RECORDS,
+    DEFAULT_CASCADE,
+    DEFAULT_CASCADE_VALIDATORS,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_FIRST_TOKEN_TIMEOUT,
+    DEFAULT_DEADLINE,
+    DEFAULT_PREFIX_CACHE,
+    DEFAULT_SOURCE,
+    DEFAULT_ENTITY_IDS,
+    DEFAULT_HISTORY_HOURS,
+    SOURCE_FILE,
+    SOURCE_RECORDER,
+    OLLAMA_TIMEOUT,
+    VALIDATOR_NOT_EMPTY,
+    VALIDATOR_STRUCTURED,
+    VALIDATOR_FITS_HELPER,
+    ENCODER_DROP_FIELDS,
+    ENCODER_PURCHASE_STATS,
+    ENCODER_DEDUPE,
+    ENCODER_CSV,
+    ENCODER_KEY_DICTIONARY,
     SCRIPT_FILENAME,
     SCRIPT_PATH,
     ERROR_INVALID_IP,
     ERROR_INVALID_URL,
     ERROR_INVALID_TOKEN,
     ERROR_INVALID_FILE,
+    ERROR_INVALID_TIME,
+    ERROR_INVALID_BACKENDS,
+    ERROR_INVALID_FORMAT,
+    ERROR_NO_ENTITIES,
+    DATA_TEMPLATES,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -102,7 +275,7 @@ class File2promptConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors[CONF_HA_TOKEN] = ERROR_INVALID_TOKEN
             
         input_file = user_input[CONF_INPUT_FILE].strip()
-        if not input_file.startswith("/config/"):
+        if not validate_input_file(input_file):
             errors[CONF_INPUT_FILE] = ERROR_INVALID_FILE
         
         if not errors:
@@ -213,7 +386,7 @@ PROMPT="{prompt_formatted}\\n\\nHere is the content:\\n$FILE_CONTENT"
 JSON="{{\\\"model\\\":\\\"{ollama_version}\\\",\\\"prompt\\\":\\\"$PROMPT\\\",\\\"stream\\\":false}}"
 
 # Send to Ollama
-RESPONSE=$(curl -s -X POST "http://{ollama_ip}:11434/api/generate" \\
+RESPONSE=$(curl -s --connect-timeout {DEFAULT_CONNECT_TIMEOUT} --max-time {OLLAMA_TIMEOUT} -X POST "http://{ollama_ip}:11434/api/generate" \\
     -H "Content-Type: application/json" \\
     -d "$JSON")
 
@@ -244,67 +417,6 @@ class File2promptOptionsFlow(config_entries.OptionsFlow):
         """Handle the initial step."""
         errors = {}
         
-        # Read the current prompt directly from the script file
-        import re
-        script_path = os.path.join(SCRIPT_PATH, SCRIPT_FILENAME)
-        current_prompt_from_file = ""
-        if os.path.exists(script_path):
-            try:
-                with open(script_path, "r") as script_file:
-                    script_content = script_file.read()
-                    # Simple approach to extract the raw PROMPT value from the script file
-                    # Get the line containing PROMPT=
-                    script_lines = script_content.split('\n')
-                    for line in script_lines:
-                        if line.strip().startswith('PROMPT='):
-                            # Found the PROMPT line, now extract its value
-                            prompt_line = line.strip()
-                            
-                            # Remove the 'PROMPT=' part and any quotes around it
-                            if "'$PROMPT'" in prompt_line:  # It's a variable reference
-                                # Try to find where the PROMPT variable is defined
-                                for var_line in script_lines:
-                                    if var_line.strip().startswith('PROMPT="') or var_line.strip().startswith("PROMPT='"):
-                                        prompt_line = var_line.strip()
-                                        break
-                                        
-                            # Now extract the value from something like: PROMPT="value" or PROMPT='value'
-                            if prompt_line.startswith('PROMPT="'):
-                                # Double-quoted value
-                                prompt_value = prompt_line[8:-1]  # Remove PROMPT=" and the ending "
-                                
-                                # Clean up the prompt value - remove the "Here is the content" part
-                                if "\\n\\nHere is the" in prompt_value:
-                                    prompt_value = prompt_value.split("\\n\\nHere is the")[0]
-                                elif "\\n\\nHere is the list" in prompt_value:
-                                    prompt_value = prompt_value.split("\\n\\nHere is the list")[0]
-                                elif "\\n\\nHere is" in prompt_value:
-                                    prompt_value = prompt_value.split("\\n\\nHere is")[0]
-                                    
-                                # Convert to single line without breaks
-                                current_prompt_from_file = prompt_value.replace('\\n', ' ').replace('\\"', '"')
-                                break
-                            elif prompt_line.startswith("PROMPT='"):
-                                # Single-quoted value
-                                prompt_value = prompt_line[8:-1]  # Remove PROMPT=' and the ending '
-                                
-                                # Clean up the prompt value - remove the "Here is the content" part
-                                if "\\n\\nHere is the" in prompt_value:
-                                    prompt_value = prompt_value.split("\\n\\nHere is the")[0]
-                                elif "\\n\\nHere is the list" in prompt_value:
-                                    prompt_value = prompt_value.split("\\n\\nHere is the list")[0]
-                                elif "\\n\\nHere is" in prompt_value:
-                                    prompt_value = prompt_value.split("\\n\\nHere is")[0]
-                                    
-                                # Convert to single line without breaks
-                                current_prompt_from_file = prompt_value.replace('\\n', ' ').replace("\\'", "'")
-                                break
-                                
-                            _LOGGER.info(f"Extracted raw PROMPT from script file")
-                            _LOGGER.info(f"Read prompt from script file: {current_prompt_from_file[:20]}...")
-            except Exception as e:
-                _LOGGER.error(f"Error reading prompt from script file: {e}")
-        
         if user_input is not None:
             # Validate IP address
             ollama_ip = user_input[CONF_OLLAMA_IP].strip()
@@ -326,8 +438,25 @@ class File2promptOptionsFlow(config_entries.OptionsFlow):
                 errors[CONF_HA_TOKEN] = ERROR_INVALID_TOKEN
                 
             input_file = user_input[CONF_INPUT_FILE].strip()
-            if not input_file.startswith("/config/"):
+            if not validate_input_file(input_file):
                 errors[CONF_INPUT_FILE] = ERROR_INVALID_FILE
+
+            warmup_times = user_input.get(CONF_WARMUP_TIMES, DEFAULT_WARMUP_TIMES).strip()
+            if parse_warmup_times(warmup_times) is None:
+                errors[CONF_WARMUP_TIMES] = ERROR_INVALID_TIME
+
+            backends = user_input.get(CONF_BACKENDS, DEFAULT_BACKENDS).strip()
+            if not validate_backends(backends):
+                errors[CONF_BACKENDS] = ERROR_INVALID_BACKENDS
+
+            output_format = user_input.get(CONF_FORMAT, DEFAULT_FORMAT).strip()
+            try:
+                parse_format(output_format)
+            except ValueError:
+                errors[CONF_FORMAT] = ERROR_INVALID_FORMAT
+
+            if user_input.get(CONF_SOURCE, DEFAULT_SOURCE) == SOURCE_RECORDER and not user_input.get(CONF_ENTITY_IDS):
+                errors[CONF_ENTITY_IDS] = ERROR_NO_ENTITIES
             
             # If validation passed, update script
             if not errors:
@@ -380,6 +509,42 @@ class File2promptOptionsFlow(config_entries.OptionsFlow):
                             CONF_HA_TOKEN: ha_token,
                             CONF_INPUT_FILE: input_file,
                             CONF_PROMPT: prompt,
+                            CONF_STREAM: user_input.get(CONF_STREAM, DEFAULT_STREAM),
+                            CONF_CACHE: user_input.get(CONF_CACHE, DEFAULT_CACHE),
+                            CONF_CACHE_TTL: user_input.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL),
+                            CONF_CHUNKED: user_input.get(CONF_CHUNKED, DEFAULT_CHUNKED),
+                            CONF_CHUNK_TOKENS: user_input.get(CONF_CHUNK_TOKENS, DEFAULT_CHUNK_TOKENS),
+                            CONF_MAX_PARALLEL: user_input.get(CONF_MAX_PARALLEL, DEFAULT_MAX_PARALLEL),
+                            CONF_INCREMENTAL: user_input.get(CONF_INCREMENTAL, DEFAULT_INCREMENTAL),
+                            CONF_ENCODERS: user_input.get(CONF_ENCODERS, DEFAULT_ENCODERS),
+                            CONF_DROP_FIELDS: user_input.get(CONF_DROP_FIELDS, DEFAULT_DROP_FIELDS).strip(),
+                            CONF_KEEP_ALIVE: user_input.get(CONF_KEEP_ALIVE, DEFAULT_KEEP_ALIVE).strip(),
+                            CONF_WARMUP: user_input.get(CONF_WARMUP, DEFAULT_WARMUP),
+                            CONF_WARMUP_TIMES: warmup_times,
+                            CONF_HOST_CONCURRENCY: user_input.get(CONF_HOST_CONCURRENCY, DEFAULT_HOST_CONCURRENCY),
+                            CONF_BACKENDS: backends,
+                            CONF_WATCH: user_input.get(CONF_WATCH, DEFAULT_WATCH),
+                            CONF_WATCH_DEBOUNCE: user_input.get(CONF_WATCH_DEBOUNCE, DEFAULT_WATCH_DEBOUNCE),
+                            CONF_LARGE_INPUT: user_input.get(CONF_LARGE_INPUT, DEFAULT_LARGE_INPUT),
+                            CONF_NUM_PREDICT: user_input.get(CONF_NUM_PREDICT, DEFAULT_NUM_PREDICT),
+                            CONF_FIT_HELPER: user_input.get(CONF_FIT_HELPER, DEFAULT_FIT_HELPER),
+                            CONF_STOP: user_input.get(CONF_STOP, DEFAULT_STOP),
+                            CONF_FORMAT: output_format,
+                            CONF_RESULT_HISTORY: user_input.get(CONF_RESULT_HISTORY, DEFAULT_RESULT_HISTORY),
+                            CONF_PROMPT_TEMPLATE: user_input.get(CONF_PROMPT_TEMPLATE, DEFAULT_PROMPT_TEMPLATE),
+                            CONF_RETRIEVAL: user_input.get(CONF_RETRIEVAL, DEFAULT_RETRIEVAL),
+                            CONF_EMBED_MODEL: user_input.get(CONF_EMBED_MODEL, DEFAULT_EMBED_MODEL).strip() or DEFAULT_EMBED_MODEL,
+                            CONF_TOP_K: user_input.get(CONF_TOP_K, DEFAULT_TOP_K),
+                            CONF_RECENT_RECORDS: user_input.get(CONF_RECENT_RECORDS, DEFAULT_RECENT_RECORDS),
+                            CONF_CASCADE: user_input.get(CONF_CASCADE, DEFAULT_CASCADE).strip(),
+                            CONF_CASCADE_VALIDATORS: user_input.get(CONF_CASCADE_VALIDATORS, DEFAULT_CASCADE_VALIDATORS),
+                            CONF_CONNECT_TIMEOUT: user_input.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+                            CONF_FIRST_TOKEN_TIMEOUT: user_input.get(CONF_FIRST_TOKEN_TIMEOUT, DEFAULT_FIRST_TOKEN_TIMEOUT),
+                            CONF_DEADLINE: user_input.get(CONF_DEADLINE, DEFAULT_DEADLINE),
+                            CONF_PREFIX_CACHE: user_input.get(CONF_PREFIX_CACHE, DEFAULT_PREFIX_CACHE),
+                            CONF_SOURCE: user_input.get(CONF_SOURCE, DEFAULT_SOURCE),
+                            CONF_ENTITY_IDS: user_input.get(CONF_ENTITY_IDS, DEFAULT_ENTITY_IDS),
+                            CONF_HISTORY_HOURS: user_input.get(CONF_HISTORY_HOURS, DEFAULT_HISTORY_HOURS),
                         },
                     )
                     
@@ -391,6 +556,13 @@ class File2promptOptionsFlow(config_entries.OptionsFlow):
                     
         # Collect current data
         current_config = dict(self.config_entry.data)
+        templates = self.hass.data.get(DATA_TEMPLATES)
+        template_names = list(templates.names) if templates else []
+        current_template = current_config.get(CONF_PROMPT_TEMPLATE, DEFAULT_PROMPT_TEMPLATE)
+        if current_template and current_template not in template_names:
+            # Keep a template that was removed since selectable, so the form
+            # still accepts its current value and the entry can be saved
+            template_names.append(current_template)
         
         # Show form with current values
         return self.async_show_form(
@@ -428,12 +600,196 @@ class File2promptOptionsFlow(config_entries.OptionsFlow):
                     ): str,
                     vol.Optional(
                         CONF_PROMPT, 
-                        default=current_prompt_from_file or current_config.get(CONF_PROMPT, DEFAULT_PROMPT)
+                        default=current_config.get(CONF_PROMPT, DEFAULT_PROMPT)
                     ): str,
                     vol.Optional(
                         CONF_RESET_PROMPT, 
                         default=False
                     ): bool,
+                    vol.Optional(
+                        CONF_PROMPT_TEMPLATE,
+                        default=current_template
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[
+                                selector.SelectOptionDict(value=DEFAULT_PROMPT_TEMPLATE, label="None (use the prompt above)"),
+                                *(
+                                    selector.SelectOptionDict(value=name, label=name)
+                                    for name in template_names
+                                ),
+                            ],
+                            mode=selector.SelectSelectorMode.DROPDOWN,
+                        ),
+                    ),
+                    vol.Optional(
+                        CONF_STREAM,
+                        default=current_config.get(CONF_STREAM, DEFAULT_STREAM)
+                    ): bool,
+                    vol.Optional(
+                        CONF_CACHE,
+                        default=current_config.get(CONF_CACHE, DEFAULT_CACHE)
+                    ): bool,
+                    vol.Optional(
+                        CONF_CACHE_TTL,
+                        default=current_config.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_CHUNKED,
+                        default=current_config.get(CONF_CHUNKED, DEFAULT_CHUNKED)
+                    ): bool,
+                    vol.Optional(
+                        CONF_CHUNK_TOKENS,
+                        default=current_config.get(CONF_CHUNK_TOKENS, DEFAULT_CHUNK_TOKENS)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=256)),
+                    vol.Optional(
+                        CONF_MAX_PARALLEL,
+                        default=current_config.get(CONF_MAX_PARALLEL, DEFAULT_MAX_PARALLEL)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Optional(
+                        CONF_INCREMENTAL,
+                        default=current_config.get(CONF_INCREMENTAL, DEFAULT_INCREMENTAL)
+                    ): bool,
+                    vol.Optional(
+                        CONF_ENCODERS,
+                        default=current_config.get(CONF_ENCODERS, DEFAULT_ENCODERS)
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[
+                                ENCODER_DROP_FIELDS,
+                                ENCODER_PURCHASE_STATS,
+                                ENCODER_DEDUPE,
+                                ENCODER_CSV,
+                                ENCODER_KEY_DICTIONARY,
+                            ],
+                            multiple=True,
+                            translation_key=CONF_ENCODERS,
+                        ),
+                    ),
+                    vol.Optional(
+                        CONF_DROP_FIELDS,
+                        default=current_config.get(CONF_DROP_FIELDS, DEFAULT_DROP_FIELDS)
+                    ): str,
+                    vol.Optional(
+                        CONF_KEEP_ALIVE,
+                        default=current_config.get(CONF_KEEP_ALIVE, DEFAULT_KEEP_ALIVE)
+                    ): str,
+                    vol.Optional(
+                        CONF_WARMUP,
+                        default=current_config.get(CONF_WARMUP, DEFAULT_WARMUP)
+                    ): bool,
+                    vol.Optional(
+                        CONF_WARMUP_TIMES,
+                        default=current_config.get(CONF_WARMUP_TIMES, DEFAULT_WARMUP_TIMES)
+                    ): str,
+                    vol.Optional(
+                        CONF_HOST_CONCURRENCY,
+                        default=current_config.get(CONF_HOST_CONCURRENCY, DEFAULT_HOST_CONCURRENCY)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Optional(
+                        CONF_BACKENDS,
+                        default=current_config.get(CONF_BACKENDS, DEFAULT_BACKENDS)
+                    ): str,
+                    vol.Optional(
+                        CONF_WATCH,
+                        default=current_config.get(CONF_WATCH, DEFAULT_WATCH)
+                    ): bool,
+                    vol.Optional(
+                        CONF_WATCH_DEBOUNCE,
+                        default=current_config.get(CONF_WATCH_DEBOUNCE, DEFAULT_WATCH_DEBOUNCE)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_LARGE_INPUT,
+                        default=current_config.get(CONF_LARGE_INPUT, DEFAULT_LARGE_INPUT)
+                    ): bool,
+                    vol.Optional(
+                        CONF_NUM_PREDICT,
+                        default=current_config.get(CONF_NUM_PREDICT, DEFAULT_NUM_PREDICT)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_FIT_HELPER,
+                        default=current_config.get(CONF_FIT_HELPER, DEFAULT_FIT_HELPER)
+                    ): bool,
+                    vol.Optional(
+                        CONF_STOP,
+                        default=current_config.get(CONF_STOP, DEFAULT_STOP)
+                    ): str,
+                    vol.Optional(
+                        CONF_FORMAT,
+                        default=current_config.get(CONF_FORMAT, DEFAULT_FORMAT)
+                    ): str,
+                    vol.Optional(
+                        CONF_RESULT_HISTORY,
+                        default=current_config.get(CONF_RESULT_HISTORY, DEFAULT_RESULT_HISTORY)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                    vol.Optional(
+                        CONF_RETRIEVAL,
+                        default=current_config.get(CONF_RETRIEVAL, DEFAULT_RETRIEVAL)
+                    ): bool,
+                    vol.Optional(
+                        CONF_EMBED_MODEL,
+                        default=current_config.get(CONF_EMBED_MODEL, DEFAULT_EMBED_MODEL)
+                    ): str,
+                    vol.Optional(
+                        CONF_TOP_K,
+                        default=current_config.get(CONF_TOP_K, DEFAULT_TOP_K)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_RECENT_RECORDS,
+                        default=current_config.get(CONF_RECENT_RECORDS, DEFAULT_RECENT_RECORDS)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_CASCADE,
+                        default=current_config.get(CONF_CASCADE, DEFAULT_CASCADE)
+                    ): str,
+                    vol.Optional(
+                        CONF_CASCADE_VALIDATORS,
+                        default=current_config.get(CONF_CASCADE_VALIDATORS, DEFAULT_CASCADE_VALIDATORS)
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[
+                                VALIDATOR_NOT_EMPTY,
+                                VALIDATOR_STRUCTURED,
+                                VALIDATOR_FITS_HELPER,
+                            ],
+                            multiple=True,
+                            translation_key=CONF_CASCADE_VALIDATORS,
+                        ),
+                    ),
+                    vol.Optional(
+                        CONF_CONNECT_TIMEOUT,
+                        default=current_config.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Optional(
+                        CONF_FIRST_TOKEN_TIMEOUT,
+                        default=current_config.get(CONF_FIRST_TOKEN_TIMEOUT, DEFAULT_FIRST_TOKEN_TIMEOUT)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_DEADLINE,
+                        default=current_config.get(CONF_DEADLINE, DEFAULT_DEADLINE)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_PREFIX_CACHE,
+                        default=current_config.get(CONF_PREFIX_CACHE, DEFAULT_PREFIX_CACHE)
+                    ): bool,
+                    vol.Optional(
+                        CONF_SOURCE,
+                        default=current_config.get(CONF_SOURCE, DEFAULT_SOURCE)
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[SOURCE_FILE, SOURCE_RECORDER],
+                            translation_key=CONF_SOURCE,
+                        ),
+                    ),
+                    vol.Optional(
+                        CONF_ENTITY_IDS,
+                        default=current_config.get(CONF_ENTITY_IDS, DEFAULT_ENTITY_IDS)
+                    ): selector.EntitySelector(
+                        selector.EntitySelectorConfig(multiple=True),
+                    ),
+                    vol.Optional(
+                        CONF_HISTORY_HOURS,
+                        default=current_config.get(CONF_HISTORY_HOURS, DEFAULT_HISTORY_HOURS)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
                 }
             ),
             errors=errors,
@@ -474,7 +830,7 @@ PROMPT="{prompt_formatted}\\n\\nHere is the content:\\n$FILE_CONTENT"
 JSON="{{\\\"model\\\":\\\"{ollama_version}\\\",\\\"prompt\\\":\\\"$PROMPT\\\",\\\"stream\\\":false}}"
 
 # Send to Ollama
-RESPONSE=$(curl -s -X POST "http://{ollama_ip}:11434/api/generate" \\
+RESPONSE=$(curl -s --connect-timeout {DEFAULT_CONNECT_TIMEOUT} --max-time {OLLAMA_TIMEOUT} -X POST "http://{ollama_ip}:11434/api/generate" \\
     -H "Content-Type: application/json" \\
     -d "$JSON")
 
@@ -12,18 +12,188 @@ CONF_PROMPT = "prompt"
 CONF_RESET_PROMPT = "reset_prompt"
 CONF_INPUT_FILE = "input_file"
 CONF_CREATE_FILE = "create_file"
+CONF_STREAM = "stream"
+CONF_CACHE = "cache"
+CONF_CACHE_TTL = "cache_ttl"
+CONF_CHUNKED = "chunked"
+CONF_CHUNK_TOKENS = "chunk_tokens"
+CONF_MAX_PARALLEL = "max_parallel"
+CONF_INCREMENTAL = "incremental"
+CONF_ENCODERS = "encoders"
+CONF_DROP_FIELDS = "drop_fields"
+CONF_KEEP_ALIVE = "keep_alive"
+CONF_WARMUP = "warmup"
+CONF_WARMUP_TIMES = "warmup_times"
+CONF_HOST_CONCURRENCY = "host_concurrency"
+CONF_BACKENDS = "backends"
+CONF_WATCH = "watch"
+CONF_WATCH_DEBOUNCE = "watch_debounce"
+CONF_LARGE_INPUT = "large_input"
+CONF_NUM_PREDICT = "num_predict"
+CONF_FIT_HELPER = "fit_helper"
+CONF_STOP = "stop"
+CONF_FORMAT = "format"
+CONF_RESULT_HISTORY = "result_history"
+CONF_PROMPT_TEMPLATE = "prompt_template"
+CONF_RETRIEVAL = "retrieval"
+CONF_EMBED_MODEL = "embed_model"
+CONF_TOP_K = "top_k"
+CONF_RECENT_RECORDS = "recent_records"
+CONF_CASCADE = "cascade"
+CONF_CASCADE_VALIDATORS = "cascade_validators"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_FIRST_TOKEN_TIMEOUT = "first_token_timeout"
+CONF_DEADLINE = "deadline"
+CONF_PREFIX_CACHE = "prefix_cache"
+CONF_SOURCE = "source"
+CONF_ENTITY_IDS = "entity_ids"
+CONF_HISTORY_HOURS = "history_hours"
 
 # Default values
 DEFAULT_OLLAMA_VERSION = "llama3.2"
 DEFAULT_PROMPT = """Below is my purchase history, including dates. I do groceries weekly (once a week). Do not give any other sentence besides the list. Compare this week's groceries to my normal pattern. Identify purchase frequencies (like weekly or monthly recurring products). Give me a list of products that are missing this week but are normally expected, without showing this week's list. Only give the missing products, on one line, separated by a comma and space. Ignore products that were bought only once, unless that was recent."""
 DEFAULT_INPUT_FILE = "/config/www/input_data.json"
+DEFAULT_STREAM = False
+DEFAULT_CACHE = False
+DEFAULT_CACHE_TTL = 1440  # minutes
+DEFAULT_CHUNKED = False
+DEFAULT_CHUNK_TOKENS = 2048
+DEFAULT_MAX_PARALLEL = 2
+DEFAULT_INCREMENTAL = False
+DEFAULT_SUMMARY_PROMPT = """Below is a summary of earlier records followed by the records added since. Write one updated, compact summary of all records that keeps every fact needed for the following instructions (items, dates, counts, frequencies). Only output the summary. Instructions:"""
+DEFAULT_ENCODERS = []
+DEFAULT_DROP_FIELDS = ""
+DEFAULT_KEEP_ALIVE = "5m"
+DEFAULT_WARMUP = False
+DEFAULT_WARMUP_TIMES = ""
+DEFAULT_HOST_CONCURRENCY = 1
+DEFAULT_BACKENDS = ""
+DEFAULT_WATCH = False
+DEFAULT_WATCH_DEBOUNCE = 10  # seconds
+DEFAULT_LARGE_INPUT = False
+DEFAULT_NUM_PREDICT = 0  # no limit
+DEFAULT_FIT_HELPER = False
+DEFAULT_STOP = ""
+DEFAULT_FORMAT = ""
+DEFAULT_RESULT_HISTORY = 10
+DEFAULT_PROMPT_TEMPLATE = ""  # use the entry's own prompt
+DEFAULT_RETRIEVAL = False
+DEFAULT_EMBED_MODEL = "nomic-embed-text"
+DEFAULT_TOP_K = 50
+DEFAULT_RECENT_RECORDS = 20
+DEFAULT_CASCADE = ""  # only the main model
+DEFAULT_CASCADE_VALIDATORS = ["not_empty", "structured"]
+DEFAULT_CONNECT_TIMEOUT = 10  # seconds
+DEFAULT_FIRST_TOKEN_TIMEOUT = 0  # seconds, 0 for no limit
+DEFAULT_DEADLINE = 0  # seconds, 0 for no limit
+DEFAULT_PREFIX_CACHE = False
+DEFAULT_SOURCE = "file"
+DEFAULT_ENTITY_IDS = []
+DEFAULT_HISTORY_HOURS = 168  # one week
+DEFAULT_MAP_PROMPT = """The data below is one part of a larger data set that is too big to analyse at once. Extract everything from this part that is needed to answer the following instructions, as compact notes. Do not answer the instructions yet. Instructions:"""
 
 # Script related
 SCRIPT_FILENAME = "file2prompt.sh"
 SCRIPT_PATH = "/config/"
 
+# Storage
+STORAGE_VERSION = 1
+CACHE_MAX_ENTRIES = 50
+CACHE_SAVE_DELAY = 10
+RESULTS_SAVE_DELAY = 10
+
+# Length of the result sensor state, the full answer is kept in its attributes
+RESULT_SUMMARY_LENGTH = 100
+# Result sensor attributes kept out of the recorder database
+RESULT_UNRECORDED_ATTRIBUTES = frozenset({"response", "result", "history"})
+
+# Ollama API
+OLLAMA_PORT = 11434
+OLLAMA_GENERATE_PATH = "/api/generate"
+OLLAMA_TAGS_PATH = "/api/tags"
+OLLAMA_EMBED_PATH = "/api/embed"
+OLLAMA_TIMEOUT = 600
+
+# Backend health checks
+HEALTH_CHECK_INTERVAL = 30
+HEALTH_CHECK_TIMEOUT = 5
+LATENCY_SMOOTHING = 0.3
+
+# Seconds between stat checks when file notifications are unavailable
+WATCH_POLL_INTERVAL = 5
+
+# Services
+SERVICE_RUN = "run"
+SERVICE_BATCH = "batch"
+SERVICE_SET_TEMPLATE = "set_template"
+SERVICE_REMOVE_TEMPLATE = "remove_template"
+SERVICE_CANCEL = "cancel"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_PRIORITY = "priority"
+ATTR_JOBS = "jobs"
+ATTR_MAX_PARALLEL = "max_parallel"
+ATTR_NAME = "name"
+ATTR_TEMPLATE = "template"
+
+# Platforms
+PLATFORMS = ["sensor"]
+
+# Telemetry
+RUN_HISTORY_SIZE = 20
+SIGNAL_RUN_COMPLETE = f"{DOMAIN}_run_complete_{{}}"
+
+# hass.data key of the integration-wide job scheduler
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+# hass.data key of the integration-wide Ollama backend pool
+DATA_BACKENDS = f"{DOMAIN}_backends"
+# hass.data key of the shared prompt template registry
+DATA_TEMPLATES = f"{DOMAIN}_templates"
+
+# Run results
+NO_RESPONSE = "No response received from Ollama."
+
+# Events
+EVENT_PARTIAL = "file2prompt_partial"
+EVENT_RESULT = "file2prompt_result"
+EVENT_BATCH_RESULT = "file2prompt_batch_result"
+
+# Input encoders
+ENCODER_DROP_FIELDS = "drop_fields"
+ENCODER_PURCHASE_STATS = "purchase_stats"
+ENCODER_DEDUPE = "dedupe"
+ENCODER_CSV = "csv"
+ENCODER_KEY_DICTIONARY = "key_dictionary"
+
+# Characters read per block when streaming a large input file
+LARGE_INPUT_BLOCK_SIZE = 1 << 16
+
+# Cascade validators, an answer that fails one is retried on the next model
+VALIDATOR_NOT_EMPTY = "not_empty"
+VALIDATOR_STRUCTURED = "structured"
+VALIDATOR_FITS_HELPER = "fits_helper"
+
+# Input sources
+SOURCE_FILE = "file"
+SOURCE_RECORDER = "recorder"
+
+# Hours of history read from the recorder per database query
+RECORDER_BATCH_HOURS = 24
+
+# Records embedded per /api/embed request when updating the retrieval index
+EMBED_BATCH_SIZE = 64
+
+# Rough characters per token, used to size prompts
+CHARS_PER_TOKEN = 4
+
+# Minimum seconds between two partial updates while streaming
+STREAM_UPDATE_INTERVAL = 0.5
+
 # Error messages
 ERROR_INVALID_IP = "Invalid IP address format"
 ERROR_INVALID_URL = "Invalid URL format"
 ERROR_INVALID_TOKEN = "Invalid token format"
-ERROR_INVALID_FILE = "Invalid file path"
\ No newline at end of file
+ERROR_INVALID_FILE = "Invalid file path"
+ERROR_INVALID_TIME = "invalid_time"
+ERROR_INVALID_BACKENDS = "invalid_backends"
+ERROR_INVALID_FORMAT = "invalid_format"
+ERROR_NO_ENTITIES = "no_entities"
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""Diagnostics support for the File2prompt integration."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    CONF_HA_TOKEN,
+)
+
+TO_REDACT = {CONF_HA_TOKEN}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """Return the entry configuration, the timings of the last runs and the cascade counts."""
+    runner = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "config": async_redact_data(dict(entry.data), TO_REDACT),
+        "runs": list(runner.history),
+        "cascade": runner.cascade,
+    }
@@ -0,0 +1,226 @@
+"""Token-efficient input encoders applied before the prompt is built."""
+import csv
+import io
+import json
+import logging
+import math
+import re
+
+import numpy as np
+
+import homeassistant.util.dt as dt_util
+
+from .chunking import load_json_records, dump_record
+from .const import (
+    CHARS_PER_TOKEN,
+    ENCODER_DROP_FIELDS,
+    ENCODER_PURCHASE_STATS,
+    ENCODER_DEDUPE,
+    ENCODER_CSV,
+    ENCODER_KEY_DICTIONARY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# A value or line starting with an ISO date, like the File integration's timestamps
+DATE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})\S*\s*(.*)")
+
+
+def estimate_tokens(text):
+    """Return a rough token estimate for a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _dump_records(records):
+    """Serialize records as a JSON array with one record per line."""
+    return "[" + ",\n".join(dump_record(record) for record in records) + "]"
+
+
+def _is_table(records):
+    """Return True when every record is a JSON object."""
+    return bool(records) and all(isinstance(record, dict) for record in records)
+
+
+def drop_fields(content, fields):
+    """Remove the given keys from every JSON object record."""
+    records = load_json_records(content)
+    if not fields or not _is_table(records):
+        return content
+    return _dump_records(
+        [{key: value for key, value in record.items() if key not in fields} for record in records]
+    )
+
+
+def _dated_items(content):
+    """Return the dates and product names of the records, or None if there are none.
+
+    JSON records use their first field holding an ISO date and their first
+    other text field. Lines are read as "<timestamp> <product>" like the File
+    integration writes them, other lines are skipped.
+    """
+    records = load_json_records(content)
+    dates = []
+    items = []
+    if records is None:
+        for line in content.splitlines():
+            match = DATE_PATTERN.match(line.strip())
+            if match and match.group(2):
+                dates.append(match.group(1))
+                items.append(match.group(2))
+    elif _is_table(records):
+        for record in records:
+            date = item = None
+            for value in record.values():
+                if not isinstance(value, str):
+                    continue
+                match = DATE_PATTERN.fullmatch(value.strip())
+                if date is None and match and not match.group(2):
+                    date = match.group(1)
+                elif item is None and value.strip():
+                    item = value.strip()
+            if date and item:
+                dates.append(date)
+                items.append(item)
+    if not dates:
+        return None
+    return dates, items
+
+
+def purchase_stats(content, fields=None):
+    """Replace dated purchase records with one row of statistics per product.
+
+    A product is due when it was bought on at least two days and its mean
+    interval between those days has passed since it was last bought.
+    """
+    parsed = _dated_items(content)
+    if parsed is None:
+        return content
+    try:
+        dates = np.array(parsed[0], dtype="datetime64[D]")
+    except ValueError as e:
+        _LOGGER.debug(f"Not computing purchase statistics: {e}")
+        return content
+
+    names = np.array([item.lower() for item in parsed[1]])
+    products, first_index, codes = np.unique(names, return_index=True, return_inverse=True)
+    counts = np.bincount(codes, minlength=len(products))
+
+    # Distinct purchase days per product, sorted by product and then date
+    days = np.unique(np.stack([codes, dates.astype(np.int64)], axis=1), axis=0)
+    day_codes = days[:, 0]
+    day_counts = np.bincount(day_codes, minlength=len(products))
+    starts = np.concatenate(([0], np.cumsum(day_counts)[:-1]))
+    first_seen = days[starts, 1]
+    last_seen = days[starts + day_counts - 1, 1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_interval = np.where(
+            day_counts > 1, (last_seen - first_seen) / (day_counts - 1), np.nan
+        )
+    today = np.datetime64(dt_util.now().date(), "D").astype(np.int64)
+    days_since = today - last_seen
+    due = (day_counts > 1) & (days_since >= mean_interval)
+
+    # Due products first, then the most bought ones
+    order = np.lexsort((-counts, ~due))
+    return _dump_records(
+        [
+            {
+                "product": parsed[1][first_index[code]],
+                "count": int(counts[code]),
+                "last_seen": str(np.datetime64(int(last_seen[code]), "D")),
+                "days_since_last": int(days_since[code]),
+                "mean_interval_days": None if np.isnan(mean_interval[code]) else round(float(mean_interval[code]), 1),
+                "due": bool(due[code]),
+            }
+            for code in order
+        ]
+    )
+
+
+def dedupe(content, fields=None):
+    """Collapse identical records into one record with a count."""
+    records = load_json_records(content)
+    if records is None:
+        lines = [line.strip() for line in content.splitlines() if line.strip()]
+        counts = {}
+        for line in lines:
+            counts[line] = counts.get(line, 0) + 1
+        return "\n".join(
+            line if count == 1 else f"{line} (x{count})" for line, count in counts.items()
+        )
+
+    counts = {}
+    for record in records:
+        key = json.dumps(record, sort_keys=True)
+        if key in counts:
+            counts[key][1] += 1
+        else:
+            counts[key] = [record, 1]
+    deduped = []
+    for record, count in counts.values():
+        if count > 1:
+            record = {**record, "count": count} if isinstance(record, dict) else {"value": record, "count": count}
+        deduped.append(record)
+    return _dump_records(deduped)
+
+
+def to_csv(content, fields=None):
+    """Turn a JSON array of objects into CSV so keys are sent only once."""
+    records = load_json_records(content)
+    if not _is_table(records):
+        return content
+
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(columns)
+    for record in records:
+        writer.writerow(
+            [
+                value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+                for value in (record.get(column, "") for column in columns)
+            ]
+        )
+    return output.getvalue()
+
+
+def key_dictionary(content, fields=None):
+    """Replace long JSON keys with short aliases and prepend a legend."""
+    records = load_json_records(content)
+    if not _is_table(records):
+        return content
+
+    aliases = {}
+    for record in records:
+        for key in record:
+            if key not in aliases:
+                aliases[key] = f"k{len(aliases)}"
+    legend = ", ".join(f"{alias}={key}" for key, alias in aliases.items())
+    encoded = _dump_records(
+        [{aliases[key]: value for key, value in record.items()} for record in records]
+    )
+    return f"Keys: {legend}\n{encoded}"
+
+
+# Encoders in the order they are applied
+ENCODERS = {
+    ENCODER_DROP_FIELDS: drop_fields,
+    ENCODER_PURCHASE_STATS: purchase_stats,
+    ENCODER_DEDUPE: dedupe,
+    ENCODER_CSV: to_csv,
+    ENCODER_KEY_DICTIONARY: key_dictionary,
+}
+
+
+def encode(content, encoders, fields=None):
+    """Apply the selected encoders and return the content with tokens saved per encoder."""
+    savings = {}
+    for name, encoder in ENCODERS.items():
+        if name not in encoders:
+            continue
+        before = estimate_tokens(content)
+        content = encoder(content, fields)
+        savings[name] = before - estimate_tokens(content)
+        _LOGGER.debug(f"Encoder {name} saved about {savings[name]} tokens")
+    return content, savings
@@ -0,0 +1,69 @@
+"""Read entity history from the recorder as prompt input."""
+from datetime import timedelta
+import logging
+
+from homeassistant.components.recorder import get_instance, history
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .chunking import dump_record
+from .const import RECORDER_BATCH_HOURS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _read_batch(hass: HomeAssistant, entity_ids, start, end, include_start):
+    """Return the state changes of one time slice as serialized records, oldest first.
+
+    Runs in the recorder's executor.
+    """
+    states = history.get_significant_states(
+        hass,
+        start,
+        end,
+        entity_ids,
+        include_start_time_state=include_start,
+        significant_changes_only=False,
+        no_attributes=True,
+    )
+    changes = sorted(
+        (
+            state
+            for entity_states in states.values()
+            for state in entity_states
+            if state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN)
+        ),
+        key=lambda state: state.last_changed,
+    )
+    return [
+        dump_record(
+            {
+                "entity_id": state.entity_id,
+                "state": state.state,
+                "time": dt_util.as_local(state.last_changed).isoformat(timespec="seconds"),
+            }
+        )
+        for state in changes
+    ]
+
+
+async def async_read_history(hass: HomeAssistant, entity_ids, hours):
+    """Return the history of the entities over the last hours as a JSON array.
+
+    The window is read in slices of RECORDER_BATCH_HOURS on the recorder's
+    executor, so one run never holds a large database result at once.
+    """
+    end = dt_util.utcnow()
+    start = end - timedelta(hours=hours)
+    recorder = get_instance(hass)
+    records = []
+    batch_start = start
+    while batch_start < end:
+        batch_end = min(batch_start + timedelta(hours=RECORDER_BATCH_HOURS), end)
+        records += await recorder.async_add_executor_job(
+            _read_batch, hass, entity_ids, batch_start, batch_end, batch_start == start
+        )
+        batch_start = batch_end
+    _LOGGER.debug(f"Read {len(records)} state changes of {len(entity_ids)} entities from the recorder")
+    return "[" + ",\n".join(records) + "]"
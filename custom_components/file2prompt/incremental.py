@@ -0,0 +1,125 @@
+"""Rolling summary state for incremental runs."""
+import json
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    DOMAIN,
+    STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def record_time(record):
+    """Return the time of a serialized recorder record."""
+    return dt_util.parse_datetime(json.loads(record)["time"])
+
+
+def records_since(records, time, seen):
+    """Return the records after time, or at time but not in seen."""
+    last = dt_util.parse_datetime(time)
+    seen = set(seen)
+    new_records = []
+    for record in records:
+        record_at = record_time(record)
+        if record_at > last or (record_at == last and record not in seen):
+            new_records.append(record)
+    return new_records
+
+
+class IncrementalState:
+    """Remember how many records were processed and a summary of them.
+
+    For recorder history, whose window slides, the time of the newest
+    processed record and the records at that time are remembered as well.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id):
+        """Initialize the state."""
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.incremental.{entry_id}")
+        self.records = 0
+        self.summary = ""
+        self.key = None
+        self.time = None
+        self.seen = []
+
+    async def async_load(self):
+        """Load the state from storage."""
+        data = await self._store.async_load() or {}
+        self.records = data.get("records", 0)
+        self.summary = data.get("summary", "")
+        self.key = data.get("key")
+        self.time = data.get("time")
+        self.seen = data.get("seen", [])
+
+    async def async_remove(self):
+        """Delete the persisted state."""
+        await self._store.async_remove()
+
+    def new_records(self, records, key):
+        """Return the records that were not part of the summary yet.
+
+        The state starts over when the prompt/model key changed or the file
+        holds fewer records than were already processed (e.g. it was rotated).
+        """
+        if key != self.key or len(records) < self.records:
+            self._reset(key)
+        return records[self.records:]
+
+    async def async_new_records_since(self, records, key):
+        """Return the recorder records newer than the last processed one.
+
+        The recorder's window drops old records as it moves, so the record
+        count says nothing about what was processed. Records at the time of
+        the newest processed one are compared by content, since several
+        states can change within the same second. Only the filtering runs
+        in the executor, the state is read and reset on the event loop.
+        """
+        if key != self.key:
+            self._reset(key)
+        if self.time is None:
+            return records
+        return await self._hass.async_add_executor_job(
+            records_since, records, self.time, self.seen
+        )
+
+    def _reset(self, key):
+        """Start over with a new prompt/model key."""
+        _LOGGER.debug("Resetting incremental state")
+        self.records = 0
+        self.summary = ""
+        self.key = key
+        self.time = None
+        self.seen = []
+
+    async def async_update(self, records, summary, timed=False):
+        """Save the processed records and the new rolling summary.
+
+        timed records are recorder records, sorted by time, which are also
+        remembered by the newest time.
+        """
+        self.records = len(records)
+        self.summary = summary
+        if timed and records:
+            # Recorder records are sorted by time, the newest ones are last
+            latest = record_time(records[-1])
+            self.time = latest.isoformat()
+            self.seen = []
+            for record in reversed(records):
+                if record_time(record) != latest:
+                    break
+                self.seen.append(record)
+        await self._store.async_save(
+            {
+                "records": self.records,
+                "summary": self.summary,
+                "key": self.key,
+                "time": self.time,
+                "seen": self.seen,
+            }
+        )
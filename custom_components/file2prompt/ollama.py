@@ -0,0 +1,133 @@
+"""Minimal async client for the Ollama HTTP API."""
+import asyncio
+import json
+import logging
+
+import aiohttp
+
+from .backends import format_backend
+from .const import (
+    DEFAULT_CONNECT_TIMEOUT,
+    OLLAMA_PORT,
+    OLLAMA_GENERATE_PATH,
+    OLLAMA_EMBED_PATH,
+    OLLAMA_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OllamaError(Exception):
+    """Raised when the Ollama server cannot be reached or returns an error."""
+
+
+class OllamaClient:
+    """Talk to a single Ollama server over Home Assistant's shared session."""
+
+    def __init__(self, session, host, port=OLLAMA_PORT, connect_timeout=DEFAULT_CONNECT_TIMEOUT):
+        """Initialize the client."""
+        self._session = session
+        self.host = host
+        self.port = port
+        self._timeout = aiohttp.ClientTimeout(
+            total=OLLAMA_TIMEOUT, sock_connect=connect_timeout or None
+        )
+
+    @property
+    def base_url(self):
+        """Return the base URL of the Ollama server."""
+        return f"http://{format_backend(self.host, self.port)}"
+
+    async def async_generate(self, payload, body=None):
+        """Call /api/generate with a non-streaming payload and return the JSON body.
+
+        When body is given it is called with the payload and must return an
+        async iterable of bytes that is sent as the request body instead.
+        """
+        url = f"{self.base_url}{OLLAMA_GENERATE_PATH}"
+        try:
+            async with self._session.post(
+                url,
+                **_request_body({**payload, "stream": False}, body),
+                timeout=self._timeout,
+            ) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    raise OllamaError(f"{url} returned {response.status}: {text[:200]}")
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise OllamaError(f"Failed to reach {url}: {e}") from e
+
+    async def async_load_model(self, model, keep_alive=None):
+        """Load a model into memory without generating anything."""
+        payload = {"model": model}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        await self.async_generate(payload)
+
+    async def async_embed(self, model, inputs, keep_alive=None):
+        """Call /api/embed and return one embedding per input text."""
+        url = f"{self.base_url}{OLLAMA_EMBED_PATH}"
+        payload = {"model": model, "input": inputs}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        try:
+            async with self._session.post(
+                url,
+                json=payload,
+                timeout=self._timeout,
+            ) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    raise OllamaError(f"{url} returned {response.status}: {text[:200]}")
+                result = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise OllamaError(f"Failed to reach {url}: {e}") from e
+        embeddings = result.get("embeddings") or []
+        if len(embeddings) != len(inputs):
+            raise OllamaError(f"{url} returned {len(embeddings)} embeddings for {len(inputs)} inputs")
+        return embeddings
+
+    async def async_generate_stream(self, payload, body=None):
+        """Call /api/generate in streaming mode and yield each NDJSON chunk."""
+        url = f"{self.base_url}{OLLAMA_GENERATE_PATH}"
+        try:
+            async with self._session.post(
+                url,
+                **_request_body({**payload, "stream": True}, body),
+                timeout=self._timeout,
+            ) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    raise OllamaError(f"{url} returned {response.status}: {text[:200]}")
+                # Lines are split by hand: the final chunk carries the context
+                # array and can exceed aiohttp's readline limit.
+                buffer = b""
+                async for data in response.content.iter_any():
+                    buffer += data
+                    *lines, buffer = buffer.split(b"\n")
+                    for line in lines:
+                        if line.strip():
+                            yield _parse_chunk(line)
+                if buffer.strip():
+                    yield _parse_chunk(buffer)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise OllamaError(f"Failed to reach {url}: {e}") from e
+
+
+def _request_body(payload, body):
+    """Return the request arguments for a JSON payload or a streamed body."""
+    if body is None:
+        return {"json": payload}
+    return {"data": body(payload), "headers": {"Content-Type": "application/json"}}
+
+
+def _parse_chunk(line):
+    """Decode one NDJSON line from a streaming response."""
+    try:
+        chunk = json.loads(line)
+    except ValueError as e:
+        raise OllamaError(f"Invalid chunk from Ollama: {line[:200]!r}") from e
+    if "error" in chunk:
+        raise OllamaError(chunk["error"])
+    return chunk
@@ -0,0 +1,56 @@
+"""Where the prompt prefix of an entry is cached on the Ollama servers."""
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PrefixState:
+    """Remember per model which server last evaluated the entry's instructions.
+
+    Ollama keeps the evaluated tokens of a loaded model and reuses them for
+    the next request that starts with the same tokens, so sending the same
+    instructions to the same server again only evaluates the data after them.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id):
+        """Initialize the state."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.prefix.{entry_id}")
+        self._models = {}
+
+    async def async_load(self):
+        """Load the state from storage."""
+        data = await self._store.async_load() or {}
+        self._models = data.get("models", {})
+
+    async def async_remove(self):
+        """Delete the persisted state."""
+        await self._store.async_remove()
+
+    def backend(self, model, key):
+        """Return the address of the server holding the prefix, or None.
+
+        The entry for the model is dropped when the instructions changed.
+        """
+        state = self._models.get(model)
+        if state is None:
+            return None
+        if state["key"] != key:
+            _LOGGER.debug(f"Instructions for {model} changed, forgetting the cached prefix")
+            self._models.pop(model)
+            return None
+        return state["backend"]
+
+    async def async_update(self, model, key, backend):
+        """Save the server that evaluated the prefix, if it changed."""
+        if self._models.get(model) == {"key": key, "backend": backend}:
+            return
+        self._models[model] = {"key": key, "backend": backend}
+        await self._store.async_save({"models": self._models})
@@ -0,0 +1,13 @@
+"""Recorder exclusions for the File2prompt integration."""
+from homeassistant.core import HomeAssistant, callback
+
+from .const import RESULT_UNRECORDED_ATTRIBUTES
+
+
+@callback
+def exclude_attributes(hass: HomeAssistant) -> set[str]:
+    """Keep the full answers of the result sensor out of the database.
+
+    Used by Home Assistant versions without per-entity _unrecorded_attributes.
+    """
+    return set(RESULT_UNRECORDED_ATTRIBUTES)
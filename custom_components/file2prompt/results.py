@@ -0,0 +1,56 @@
+"""Bounded history of full answers for the File2prompt result sensor."""
+from collections import deque
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    DEFAULT_RESULT_HISTORY,
+    RESULTS_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def summarize(text, length):
+    """Return the first line of a text, shortened to the given length."""
+    lines = text.strip().splitlines()
+    first_line = lines[0].strip() if lines else ""
+    if len(first_line) > length or len(lines) > 1:
+        return first_line[:length - 1].rstrip() + "…"
+    return first_line
+
+
+class ResultHistory:
+    """Ring buffer of the last answers of an entry, persisted under .storage."""
+
+    def __init__(self, hass: HomeAssistant, entry_id, size=DEFAULT_RESULT_HISTORY):
+        """Initialize the history."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.results.{entry_id}")
+        self.results = deque(maxlen=size)
+
+    @property
+    def latest(self):
+        """Return the most recent result, or None."""
+        return self.results[-1] if self.results else None
+
+    async def async_load(self):
+        """Load the stored results."""
+        data = await self._store.async_load() or {}
+        self.results.extend(data.get("results", []))
+
+    async def async_remove(self):
+        """Delete the stored results."""
+        await self._store.async_remove()
+
+    def add(self, result):
+        """Add a result, dropping the oldest one when the buffer is full."""
+        self.results.append(result)
+        self._store.async_delay_save(self._data_to_save, RESULTS_SAVE_DELAY)
+
+    def _data_to_save(self):
+        """Return the data to persist."""
+        return {"results": list(self.results)}
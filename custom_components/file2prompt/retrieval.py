@@ -0,0 +1,192 @@
+"""Embedding index that selects the records relevant to the prompt."""
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+from homeassistant.core import HomeAssistant
+
+from .chunking import dump_record, load_json_records
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def split_content(content):
+    """Return the records of the content and whether it is a JSON array."""
+    records = load_json_records(content)
+    if records is not None:
+        return [dump_record(record) for record in records], True
+    return [line.strip() for line in content.splitlines() if line.strip()], False
+
+
+def join_records(records, is_json):
+    """Join records back into content of the same kind."""
+    if is_json:
+        return "[" + ",\n".join(records) + "]"
+    return "\n".join(records)
+
+
+def hash_records(records):
+    """Return a content hash per record."""
+    return [hashlib.sha256(record.encode("utf-8")).hexdigest() for record in records]
+
+
+def normalize(vectors):
+    """Scale vectors to unit length so a dot product is the cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class RetrievalIndex:
+    """Record embeddings of an entry's input file, saved as a NumPy archive.
+
+    Vectors are keyed by the hash of the record text, so only records that
+    were added since the last run need to be embedded.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id):
+        """Initialize the index."""
+        self.hass = hass
+        self.path = hass.config.path(".storage", f"{DOMAIN}.index.{entry_id}.npz")
+        self.model = None
+        self._hashes = []
+        self._rows = {}
+        self._vectors = None
+        self._pending = []
+        self._query_key = ""
+        self._query = None
+        self._loaded = False
+        self._changed = False
+
+    async def async_load(self):
+        """Load the saved index the first time it is needed."""
+        if not self._loaded:
+            await self.hass.async_add_executor_job(self._load)
+
+    async def async_save(self):
+        """Save the index if it changed."""
+        if self._changed:
+            await self.hass.async_add_executor_job(self._save)
+
+    async def async_remove(self):
+        """Delete the saved index."""
+        await self.hass.async_add_executor_job(self._remove)
+
+    def _load(self):
+        """Read the archive."""
+        self._loaded = True
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                self.model = str(data["model"])
+                self._hashes = data["hashes"].tolist()
+                self._vectors = data["vectors"]
+                self._query_key = str(data["query_key"])
+                self._query = data["query"] if self._query_key else None
+        except FileNotFoundError:
+            return
+        except (OSError, KeyError, ValueError) as e:
+            _LOGGER.warning(f"Ignoring unreadable retrieval index {self.path}: {e}")
+            self._reset(None)
+            return
+        self._rows = {record_hash: row for row, record_hash in enumerate(self._hashes)}
+        _LOGGER.debug(f"Loaded {len(self._hashes)} record vectors from {self.path}")
+
+    def _save(self):
+        """Write the archive, replacing the previous one atomically."""
+        vectors = self._matrix()
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as index_file:
+            np.savez(
+                index_file,
+                model=np.array(self.model or ""),
+                hashes=np.array(self._hashes, dtype=str),
+                vectors=vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32),
+                query_key=np.array(self._query_key),
+                query=self._query if self._query is not None else np.zeros(0, dtype=np.float32),
+            )
+        os.replace(temp_path, self.path)
+        self._changed = False
+
+    def _remove(self):
+        """Delete the archive file."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _reset(self, model):
+        """Forget every vector."""
+        self.model = model
+        self._hashes = []
+        self._rows = {}
+        self._vectors = None
+        self._pending = []
+        self._query_key = ""
+        self._query = None
+        self._changed = True
+
+    def _matrix(self):
+        """Return all vectors as one matrix, merging the ones added since."""
+        if self._pending:
+            blocks = ([self._vectors] if self._vectors is not None and len(self._vectors) else []) + self._pending
+            self._vectors = np.vstack(blocks)
+            self._pending = []
+        return self._vectors
+
+    def missing(self, hashes, model):
+        """Return the positions of the records that have no vector yet.
+
+        Vectors of another embedding model and of records that are no longer
+        in the file are dropped first.
+        """
+        if model != self.model:
+            self._reset(model)
+
+        current = set(hashes)
+        if any(record_hash not in current for record_hash in self._hashes):
+            vectors = self._matrix()
+            keep = [row for row, record_hash in enumerate(self._hashes) if record_hash in current]
+            self._hashes = [self._hashes[row] for row in keep]
+            self._vectors = vectors[keep]
+            self._rows = {record_hash: row for row, record_hash in enumerate(self._hashes)}
+            self._changed = True
+
+        missing = []
+        seen = set()
+        for position, record_hash in enumerate(hashes):
+            if record_hash not in self._rows and record_hash not in seen:
+                seen.add(record_hash)
+                missing.append(position)
+        return missing
+
+    def add(self, hashes, vectors):
+        """Add the vectors of new records."""
+        for record_hash in hashes:
+            self._rows[record_hash] = len(self._hashes)
+            self._hashes.append(record_hash)
+        self._pending.append(normalize(vectors))
+        self._changed = True
+
+    def query(self, key):
+        """Return the cached query vector for a key, or None."""
+        return self._query if key == self._query_key else None
+
+    def set_query(self, key, vector):
+        """Cache the query vector of the current prompt."""
+        self._query_key = key
+        self._query = normalize(vector)
+        self._changed = True
+
+    def search(self, hashes, top_k, recent):
+        """Return the positions of the top_k records most similar to the query plus the last recent ones, in file order."""
+        recent_start = max(len(hashes) - recent, 0)
+        older = [self._rows[record_hash] for record_hash in hashes[:recent_start]]
+        top_k = min(top_k, len(older))
+        selected = set(range(recent_start, len(hashes)))
+        if top_k:
+            scores = self._matrix()[older] @ self._query
+            selected.update(np.argpartition(-scores, top_k - 1)[:top_k].tolist())
+        return sorted(selected)
@@ -0,0 +1,981 @@
+"""In-process run engine for the File2prompt integration."""
+import asyncio
+from collections import deque
+from functools import partial
+import json
+import logging
+import math
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import MAX_LENGTH_STATE_STATE
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+import homeassistant.util.dt as dt_util
+
+from .config_flow import ensure_single_line, parse_format
+from .const import (
+    CONF_OLLAMA_IP,
+    CONF_OLLAMA_VERSION,
+    CONF_HELPER_ENTITY,
+    CONF_PROMPT,
+    CONF_INPUT_FILE,
+    CONF_STREAM,
+    CONF_CACHE,
+    CONF_CACHE_TTL,
+    CONF_CHUNKED,
+    CONF_CHUNK_TOKENS,
+    CONF_MAX_PARALLEL,
+    CONF_INCREMENTAL,
+    CONF_ENCODERS,
+    CONF_DROP_FIELDS,
+    CONF_KEEP_ALIVE,
+    CONF_HOST_CONCURRENCY,
+    CONF_BACKENDS,
+    CONF_LARGE_INPUT,
+    CONF_NUM_PREDICT,
+    CONF_FIT_HELPER,
+    CONF_STOP,
+    CONF_FORMAT,
+    CONF_PROMPT_TEMPLATE,
+    CONF_RETRIEVAL,
+    CONF_EMBED_MODEL,
+    CONF_TOP_K,
+    CONF_RECENT_RECORDS,
+    CONF_CASCADE,
+    CONF_CASCADE_VALIDATORS,
+    CONF_CONNECT_TIMEOUT,
+    CONF_FIRST_TOKEN_TIMEOUT,
+    CONF_DEADLINE,
+    CONF_PREFIX_CACHE,
+    CONF_SOURCE,
+    CONF_ENTITY_IDS,
+    CONF_HISTORY_HOURS,
+    DEFAULT_OLLAMA_VERSION,
+    DEFAULT_PROMPT,
+    DEFAULT_INPUT_FILE,
+    DEFAULT_STREAM,
+    DEFAULT_CACHE,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_CHUNKED,
+    DEFAULT_CHUNK_TOKENS,
+    DEFAULT_MAX_PARALLEL,
+    DEFAULT_MAP_PROMPT,
+    DEFAULT_INCREMENTAL,
+    DEFAULT_SUMMARY_PROMPT,
+    DEFAULT_ENCODERS,
+    DEFAULT_DROP_FIELDS,
+    DEFAULT_KEEP_ALIVE,
+    DEFAULT_HOST_CONCURRENCY,
+    DEFAULT_BACKENDS,
+    DEFAULT_LARGE_INPUT,
+    DEFAULT_NUM_PREDICT,
+    DEFAULT_FIT_HELPER,
+    DEFAULT_STOP,
+    DEFAULT_FORMAT,
+    DEFAULT_PROMPT_TEMPLATE,
+    DEFAULT_RETRIEVAL,
+    DEFAULT_EMBED_MODEL,
+    DEFAULT_TOP_K,
+    DEFAULT_RECENT_RECORDS,
+    DEFAULT_CASCADE,
+    DEFAULT_CASCADE_VALIDATORS,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_FIRST_TOKEN_TIMEOUT,
+    DEFAULT_DEADLINE,
+    DEFAULT_PREFIX_CACHE,
+    DEFAULT_SOURCE,
+    DEFAULT_ENTITY_IDS,
+    DEFAULT_HISTORY_HOURS,
+    SOURCE_FILE,
+    SOURCE_RECORDER,
+    ENCODER_PURCHASE_STATS,
+    VALIDATOR_NOT_EMPTY,
+    VALIDATOR_STRUCTURED,
+    VALIDATOR_FITS_HELPER,
+    EMBED_BATCH_SIZE,
+    LARGE_INPUT_BLOCK_SIZE,
+    CHARS_PER_TOKEN,
+    NO_RESPONSE,
+    EVENT_PARTIAL,
+    EVENT_RESULT,
+    STREAM_UPDATE_INTERVAL,
+    RUN_HISTORY_SIZE,
+    SIGNAL_RUN_COMPLETE,
+    DATA_TEMPLATES,
+)
+from .cache import cache_key, hash_file
+from .chunking import split_records, chunk_records
+from .encoders import encode
+from .history import async_read_history
+from .ollama import OllamaClient, OllamaError
+from .retrieval import hash_records, join_records, split_content
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Timing fields of an /api/generate response that are kept per run
+TIMING_FIELDS = (
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+)
+
+
+class InputFileError(Exception):
+    """Raised when the input file cannot be opened or read while it is streamed into a request."""
+
+
+def read_input_file(path):
+    """Read the input file."""
+    with open(path, "r", encoding="utf-8") as input_file:
+        return input_file.read()
+
+
+CONTENT_HEADER = "Here is the content:"
+
+
+def build_prompt(prompt, content, header=CONTENT_HEADER):
+    """Combine the prompt and the content into one prompt.
+
+    Unlike the script, newlines in the content are kept so records stay separated.
+    """
+    return f"{ensure_single_line(prompt)}\n\n{header}\n{content}"
+
+
+async def iter_prompt_body(hass: HomeAssistant, payload, input_file):
+    """Yield a JSON request body whose prompt continues with the open file's content.
+
+    The file is read from the start, block by block in the executor, and
+    every block is JSON-escaped on its own, so the content is never held in
+    memory at once.
+    """
+    payload = dict(payload)
+    prompt = payload.pop("prompt")
+    head = json.dumps({**payload, "prompt": prompt})
+    # Leave the prompt string open by dropping the closing quote and brace
+    yield head[:-2].encode()
+
+    # A request that failed over sends the file again
+    await hass.async_add_executor_job(input_file.seek, 0)
+    while True:
+        try:
+            block = await hass.async_add_executor_job(input_file.read, LARGE_INPUT_BLOCK_SIZE)
+        except (OSError, UnicodeDecodeError) as e:
+            raise InputFileError(e) from e
+        if not block:
+            break
+        yield json.dumps(block)[1:-1].encode()
+
+    yield b'"}'
+
+
+def parse_keep_alive(value):
+    """Convert a keep_alive option to what Ollama expects.
+
+    Plain numbers are seconds (negative keeps the model loaded forever) and
+    must be sent as numbers, durations like "10m" are sent as strings.
+    """
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def parse_stop(value):
+    """Split the comma separated stop sequences, turning \\n and \\t into newlines and tabs."""
+    return [
+        part.strip().replace("\\n", "\n").replace("\\t", "\t")
+        for part in value.split(",")
+        if part.strip()
+    ]
+
+
+def parse_result(text):
+    """Parse a structured answer, returning None if it is not valid JSON."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def format_result(value):
+    """Render a parsed answer as readable text for the helper state."""
+    if isinstance(value, dict):
+        return "; ".join(format_result(item) for item in value.values())
+    if isinstance(value, list):
+        return ", ".join(format_result(item) for item in value)
+    return str(value)
+
+
+class File2promptRunner:
+    """Run a config entry without spawning the generated shell script."""
+
+    # Whether runs fire the result event and feed the entry's telemetry
+    reports_runs = True
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, cache, incremental, pool, results=None, index=None, prefix=None
+    ):
+        """Initialize the runner."""
+        self.hass = hass
+        self.entry = entry
+        self.cache = cache
+        self.incremental = incremental
+        self.pool = pool
+        self.results = results
+        self.index = index
+        self.prefix = prefix
+        self.history = deque(maxlen=RUN_HISTORY_SIZE)
+        # Final answers asked from and accepted from each cascade model
+        self.cascade = {}
+        self._timings = {}
+        self._tokens_saved = {}
+        self._answer_model = None
+        # Final answer streamed so far, published when the run is cut short
+        self._partial = ""
+        self._run_task = None
+        self._cancel_requested = False
+        # Error reading the streamed request body, which is not the server's fault
+        self._body_error = None
+        # Address of the server the scheduler holds this run's slot on
+        self.server = None
+
+    @property
+    def config(self):
+        """Return the current entry configuration."""
+        return self.entry.data
+
+    @property
+    def model(self):
+        """Return the configured Ollama model."""
+        return self.config.get(CONF_OLLAMA_VERSION, DEFAULT_OLLAMA_VERSION)
+
+    @property
+    def models(self):
+        """Return the models to try for the final answer, ending with the main model."""
+        cascade = [
+            model.strip()
+            for model in self.config.get(CONF_CASCADE, DEFAULT_CASCADE).split(",")
+            if model.strip()
+        ]
+        return list(dict.fromkeys(model for model in cascade if model != self.model)) + [self.model]
+
+    @property
+    def prompt(self):
+        """Return the prompt, rendered from the selected template if there is one."""
+        name = self.config.get(CONF_PROMPT_TEMPLATE, DEFAULT_PROMPT_TEMPLATE)
+        templates = self.hass.data.get(DATA_TEMPLATES)
+        if name and templates is not None:
+            rendered = templates.async_render(name)
+            if rendered is not None:
+                return rendered
+            _LOGGER.warning(f"Prompt template {name} is unavailable, using the entry's prompt")
+        return self.config.get(CONF_PROMPT, DEFAULT_PROMPT)
+
+    @property
+    def backends(self):
+        """Return the addresses of the Ollama servers this entry may use."""
+        extra = self.config.get(CONF_BACKENDS, DEFAULT_BACKENDS).split(",")
+        return [self.config[CONF_OLLAMA_IP]] + [address.strip() for address in extra if address.strip()]
+
+    @property
+    def server_concurrency(self):
+        """Return how many runs may use one Ollama server at once."""
+        return self.config.get(CONF_HOST_CONCURRENCY, DEFAULT_HOST_CONCURRENCY)
+
+    def _client(self, backend):
+        """Return a client for one Ollama server."""
+        return OllamaClient(
+            async_get_clientsession(self.hass),
+            backend.host,
+            backend.port,
+            self.config.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+        )
+
+    async def _async_request(self, request, preferred=None, on_success=None):
+        """Call request(client) on the preferred server, failing over to the others.
+
+        A run that holds a scheduler slot sends its requests to that server
+        instead, so the per-server limit holds, and the slot follows a
+        failover. on_success is called with the address of the server that
+        answered.
+        """
+        error = OllamaError("No Ollama server configured")
+        for backend in self.pool.select(self.backends, self.server or preferred):
+            if self.server is not None:
+                self.server = backend.address
+            backend.in_flight += 1
+            try:
+                result = await request(self._client(backend))
+                if on_success is not None:
+                    await on_success(backend.address)
+                return result
+            except OllamaError as e:
+                if self._body_error is not None:
+                    # aiohttp reports a failing request body as a connection error
+                    raise self._body_error from e
+                self.pool.mark_failed(backend)
+                error = e
+            finally:
+                backend.in_flight -= 1
+        raise error
+
+    @property
+    def prefix_server(self):
+        """Return the server that last evaluated the instructions for the first model, or None."""
+        if self.prefix is None or not self.config.get(CONF_PREFIX_CACHE, DEFAULT_PREFIX_CACHE):
+            return None
+        model = self.models[0]
+        return self.prefix.backend(model, cache_key(ensure_single_line(self.prompt), model))
+
+    @property
+    def keep_alive(self):
+        """Return the keep_alive value sent with every request."""
+        return parse_keep_alive(self.config.get(CONF_KEEP_ALIVE, DEFAULT_KEEP_ALIVE))
+
+    @property
+    def output_format(self):
+        """Return the structured output format, or None for plain text."""
+        try:
+            return parse_format(self.config.get(CONF_FORMAT, DEFAULT_FORMAT))
+        except ValueError as e:
+            _LOGGER.error(f"Ignoring invalid structured output format: {e}")
+            return None
+
+    @property
+    def helper_max_length(self):
+        """Return how many characters the helper can hold."""
+        helper = self.hass.states.get(self.config.get(CONF_HELPER_ENTITY) or "")
+        return min(
+            helper.attributes.get("max", MAX_LENGTH_STATE_STATE) if helper else MAX_LENGTH_STATE_STATE,
+            MAX_LENGTH_STATE_STATE,
+        )
+
+    @property
+    def num_predict(self):
+        """Return the maximum number of answer tokens, 0 for no limit."""
+        num_predict = self.config.get(CONF_NUM_PREDICT, DEFAULT_NUM_PREDICT)
+        if not self.config.get(CONF_FIT_HELPER, DEFAULT_FIT_HELPER) or self.output_format:
+            return num_predict
+        helper_tokens = math.ceil(self.helper_max_length / CHARS_PER_TOKEN)
+        return min(num_predict, helper_tokens) if num_predict else helper_tokens
+
+    def _answer_options(self):
+        """Return the request fields that shape the final answer."""
+        fields = {}
+        options = {}
+        if self.num_predict:
+            options["num_predict"] = self.num_predict
+        if stop := parse_stop(self.config.get(CONF_STOP, DEFAULT_STOP)):
+            options["stop"] = stop
+        if options:
+            fields["options"] = options
+        if output_format := self.output_format:
+            fields["format"] = output_format
+        return fields
+
+    @property
+    def has_deadline(self):
+        """Return True when a first-token or total deadline is set."""
+        return bool(
+            self.config.get(CONF_FIRST_TOKEN_TIMEOUT, DEFAULT_FIRST_TOKEN_TIMEOUT)
+            or self.config.get(CONF_DEADLINE, DEFAULT_DEADLINE)
+        )
+
+    @callback
+    def async_cancel(self):
+        """Cancel the run in whatever step it is, publishing what was streamed so far.
+
+        Return False when no run is in progress.
+        """
+        if self._run_task is None or self._run_task.done():
+            return False
+        self._cancel_requested = True
+        self._run_task.cancel()
+        return True
+
+    async def async_warm_up(self):
+        """Load the configured models so the next run does not pay for a cold start."""
+        for backend in self.pool.select(self.backends):
+            for model in self.models:
+                try:
+                    await self._client(backend).async_load_model(model, self.keep_alive)
+                    _LOGGER.debug(f"Warmed up model {model} on {backend.base_url}")
+                except OllamaError as e:
+                    _LOGGER.warning(f"Failed to warm up model {model}: {e}")
+
+    async def async_run(self):
+        """Read the input file, ask Ollama and write the answer to the helper."""
+        start = time.monotonic()
+        self._timings = {}
+        self._tokens_saved = {}
+        self._answer_model = None
+        summary, cached, truncated = await self._async_answer_within_deadline()
+        summary = summary.strip() or NO_RESPONSE
+
+        result = None
+        if self.output_format and summary != NO_RESPONSE:
+            result = parse_result(summary)
+            if result is None:
+                _LOGGER.warning(f"Structured answer is not valid JSON: {summary[:100]}")
+
+        if result is None:
+            # Clear a previous structured result so it does not outlive a failed parse
+            self.async_write_helper(summary, {"result": None} if self.output_format else None)
+        else:
+            self.async_write_helper(format_result(result), {"result": result})
+        if self.results is not None:
+            self.results.add(
+                {
+                    "time": dt_util.utcnow().isoformat(),
+                    "response": summary,
+                    "result": result,
+                    "cached": cached,
+                    "truncated": truncated,
+                    "model": self._answer_model or self.model,
+                }
+            )
+        if not self.reports_runs:
+            return summary
+        self.hass.bus.async_fire(
+            EVENT_RESULT,
+            {
+                "entry_id": self.entry.entry_id,
+                "response": summary,
+                "result": result,
+                "cached": cached,
+                "truncated": truncated,
+                "cache_hits": self.cache.hits,
+                "cache_misses": self.cache.misses,
+                "tokens_saved": self._tokens_saved,
+            },
+        )
+        self._async_record_run(time.monotonic() - start, cached, truncated)
+        return summary
+
+    async def _async_answer_within_deadline(self):
+        """Answer within the total deadline and return the text, whether it was cached and whether it was cut short.
+
+        The deadline and cancellation cover the whole run, from reading the
+        input to the final answer. When the deadline passes or the run is
+        cancelled, the generation is cancelled, which closes the connection
+        so Ollama stops generating, and the final answer streamed so far is
+        returned instead.
+        """
+        deadline = self.config.get(CONF_DEADLINE, DEFAULT_DEADLINE)
+        self._partial = ""
+        self._cancel_requested = False
+        self._run_task = self.hass.async_create_task(self._async_answer_input())
+        try:
+            summary, cached = await asyncio.wait_for(self._run_task, deadline or None)
+            return summary, cached, False
+        except asyncio.TimeoutError:
+            _LOGGER.warning(f"Run of {self.entry.title} hit its {deadline} second deadline")
+        except asyncio.CancelledError:
+            if not self._cancel_requested:
+                raise
+            _LOGGER.info(f"Run of {self.entry.title} was cancelled")
+        finally:
+            self._run_task = None
+        return self._partial, False, True
+
+    async def _async_answer_input(self):
+        """Read the input and answer the prompt over it, from the cache when possible.
+
+        Return the answer and whether it came from the cache.
+        """
+        input_file = self.config.get(CONF_INPUT_FILE, DEFAULT_INPUT_FILE)
+        single_line_prompt = ensure_single_line(self.prompt)
+        # The answer options change the answer, so they are part of the cache key
+        answer_options = json.dumps(self._answer_options(), sort_keys=True)
+        models = ",".join(self.models)
+
+        use_cache = self.config.get(CONF_CACHE, DEFAULT_CACHE)
+        read_failed = False
+        from_recorder = self.config.get(CONF_SOURCE, DEFAULT_SOURCE) == SOURCE_RECORDER
+        if self.config.get(CONF_LARGE_INPUT, DEFAULT_LARGE_INPUT) and not from_recorder:
+            # Stream the file into the request without loading it. Hashing
+            # reads the whole file once more, so it is only done for the cache.
+            key = None
+            if use_cache:
+                file_hash = await self.hass.async_add_executor_job(hash_file, input_file)
+                if file_hash is None:
+                    _LOGGER.error(f"Failed to read input file {input_file}")
+                    read_failed = True
+                else:
+                    key = cache_key(file_hash, single_line_prompt, models, answer_options)
+            answer = partial(self._async_answer_file, single_line_prompt, input_file)
+        else:
+            if from_recorder:
+                content = await self._async_read_recorder()
+                if content is None:
+                    read_failed = True
+                    content = ""
+            else:
+                try:
+                    content = await self.hass.async_add_executor_job(read_input_file, input_file)
+                except (OSError, UnicodeDecodeError) as e:
+                    _LOGGER.error(f"Failed to read input file {input_file}: {e}")
+                    read_failed = True
+                    content = ""
+
+            if content and self.index is not None and self.config.get(CONF_RETRIEVAL, DEFAULT_RETRIEVAL):
+                content = await self._async_retrieve(single_line_prompt, content)
+
+            if self.config.get(CONF_INCREMENTAL, DEFAULT_INCREMENTAL):
+                # Only the new records are encoded, after the split, so the
+                # encoder options are part of the key instead
+                key = cache_key(
+                    content,
+                    single_line_prompt,
+                    models,
+                    answer_options,
+                    self.config.get(CONF_ENCODERS, DEFAULT_ENCODERS),
+                    self.config.get(CONF_DROP_FIELDS, DEFAULT_DROP_FIELDS),
+                )
+            else:
+                content = await self._async_encode(content)
+                key = cache_key(content, single_line_prompt, models, answer_options)
+            answer = partial(self._async_answer, single_line_prompt, content)
+
+        if read_failed:
+            # Do not ask Ollama about content that could not be read
+            return "", False
+
+        if use_cache:
+            ttl = self.config.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL) * 60
+            summary = self.cache.get(key, ttl)
+            if summary is not None:
+                return summary, True
+
+        try:
+            summary = (await answer()).strip()
+        except OllamaError as e:
+            _LOGGER.error(f"Ollama request failed: {e}")
+            return "", False
+        except InputFileError as e:
+            _LOGGER.error(f"Failed to read input file {input_file}: {e}")
+            return "", False
+
+        if use_cache and summary:
+            self.cache.set(key, summary)
+        return summary, False
+
+    async def _async_encode(self, content):
+        """Apply the configured input encoders, counting the tokens they saved."""
+        fields = [
+            field.strip()
+            for field in self.config.get(CONF_DROP_FIELDS, DEFAULT_DROP_FIELDS).split(",")
+            if field.strip()
+        ]
+        encoders = self.config.get(CONF_ENCODERS, DEFAULT_ENCODERS)
+        if ENCODER_PURCHASE_STATS in encoders and self.config.get(CONF_INCREMENTAL, DEFAULT_INCREMENTAL):
+            # Incremental runs only encode the new records, statistics over those would be wrong
+            _LOGGER.warning("Purchase statistics need the whole history, skipping them in incremental mode")
+            encoders = [name for name in encoders if name != ENCODER_PURCHASE_STATS]
+        content, self._tokens_saved = await self.hass.async_add_executor_job(encode, content, encoders, fields)
+        return content
+
+    async def _async_read_recorder(self):
+        """Read the history of the configured entities instead of the input file.
+
+        Return None when the history cannot be read.
+        """
+        entity_ids = self.config.get(CONF_ENTITY_IDS, DEFAULT_ENTITY_IDS)
+        if not entity_ids:
+            _LOGGER.error("No entities configured to read from the recorder")
+            return None
+        if "recorder" not in self.hass.config.components:
+            _LOGGER.error("The recorder is not set up, cannot read the history of the entities")
+            return None
+        try:
+            return await async_read_history(
+                self.hass, entity_ids, self.config.get(CONF_HISTORY_HOURS, DEFAULT_HISTORY_HOURS)
+            )
+        except SQLAlchemyError as e:
+            _LOGGER.error(f"Failed to read the history of {', '.join(entity_ids)}: {e}")
+            return None
+
+    async def _async_retrieve(self, prompt, content):
+        """Keep the records most relevant to the prompt plus the most recent ones.
+
+        Falls back to the full content when the records cannot be embedded.
+        """
+        top_k = self.config.get(CONF_TOP_K, DEFAULT_TOP_K)
+        recent = self.config.get(CONF_RECENT_RECORDS, DEFAULT_RECENT_RECORDS)
+        records, is_json = await self.hass.async_add_executor_job(split_content, content)
+        if len(records) <= top_k + recent:
+            return content
+
+        model = self.config.get(CONF_EMBED_MODEL, DEFAULT_EMBED_MODEL)
+        index = self.index
+        await index.async_load()
+        hashes = await self.hass.async_add_executor_job(hash_records, records)
+        missing = await self.hass.async_add_executor_job(index.missing, hashes, model)
+        try:
+            if missing:
+                _LOGGER.debug(f"Embedding {len(missing)} new records with {model}")
+            for start in range(0, len(missing), EMBED_BATCH_SIZE):
+                batch = missing[start:start + EMBED_BATCH_SIZE]
+                vectors = await self._async_request(
+                    lambda client: client.async_embed(
+                        model, [records[position] for position in batch], self.keep_alive
+                    )
+                )
+                index.add([hashes[position] for position in batch], vectors)
+
+            query_key = cache_key(prompt, model)
+            if index.query(query_key) is None:
+                vectors = await self._async_request(
+                    lambda client: client.async_embed(model, [prompt], self.keep_alive)
+                )
+                index.set_query(query_key, vectors[0])
+        except OllamaError as e:
+            _LOGGER.warning(f"Failed to embed the input records, sending all of them: {e}")
+            return content
+        finally:
+            await index.async_save()
+
+        positions = await self.hass.async_add_executor_job(index.search, hashes, top_k, recent)
+        _LOGGER.debug(f"Retrieved {len(positions)} of {len(records)} records")
+        return join_records([records[position] for position in positions], is_json)
+
+    def _record_timings(self, result):
+        """Add the timing fields of one Ollama response to the current run."""
+        for field in TIMING_FIELDS:
+            if field in result:
+                self._timings[field] = self._timings.get(field, 0) + result[field]
+        self._timings["requests"] = self._timings.get("requests", 0) + 1
+
+    def _async_record_run(self, latency, cached, truncated=False):
+        """Store the telemetry of a finished run and notify the sensors."""
+        record = {
+            "time": dt_util.utcnow().isoformat(),
+            "latency": round(latency, 3),
+            "cached": cached,
+            "truncated": truncated,
+            "requests": self._timings.get("requests", 0),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+        if self._answer_model is not None:
+            record["model"] = self._answer_model
+        if len(self.models) > 1 and (first := self.cascade.get(self.models[0])):
+            record["cascade_hit_rate"] = round(100 * first["accepted"] / first["attempts"], 1)
+        for field in TIMING_FIELDS:
+            if field not in self._timings:
+                continue
+            if field.endswith("_duration"):
+                # Ollama reports durations in nanoseconds
+                record[field] = round(self._timings[field] / 1e9, 3)
+            else:
+                record[field] = self._timings[field]
+        if record.get("eval_duration"):
+            record["tokens_per_second"] = round(
+                record.get("eval_count", 0) / record["eval_duration"], 2
+            )
+        self.history.append(record)
+        async_dispatcher_send(self.hass, SIGNAL_RUN_COMPLETE.format(self.entry.entry_id), record)
+
+    async def _async_answer_file(self, prompt, path):
+        """Answer the prompt over the input file, streaming it into the request body.
+
+        The file is opened before any request is sent, so a missing file is
+        reported as such instead of as a failing server.
+        """
+        try:
+            input_file = await self.hass.async_add_executor_job(partial(open, path, "r", encoding="utf-8"))
+        except OSError as e:
+            raise InputFileError(e) from e
+        self._body_error = None
+        try:
+            return await self._async_ask(prompt, "", body=partial(self._iter_file_body, input_file))
+        finally:
+            self._body_error = None
+            await self.hass.async_add_executor_job(input_file.close)
+
+    async def _iter_file_body(self, input_file, payload):
+        """Yield the request body over the open input file, remembering a read error."""
+        try:
+            async for data in iter_prompt_body(self.hass, payload, input_file):
+                yield data
+        except InputFileError as e:
+            self._body_error = e
+            raise
+
+    async def _async_answer(self, prompt, content):
+        """Answer the prompt over the content in the configured mode."""
+        if self.config.get(CONF_INCREMENTAL, DEFAULT_INCREMENTAL):
+            return await self._async_answer_incremental(prompt, content)
+        return await self._async_answer_content(prompt, content)
+
+    async def _async_answer_incremental(self, prompt, content):
+        """Answer over the rolling summary plus the records added since the last run.
+
+        The input encoders are applied to the new records only, since they
+        rewrite and merge records and would shift the processed count.
+        """
+        records, is_json = await self.hass.async_add_executor_job(split_content, content)
+        key = cache_key(prompt, self.model)
+        from_recorder = self.config.get(CONF_SOURCE, DEFAULT_SOURCE) == SOURCE_RECORDER
+        if from_recorder:
+            new_records = await self.incremental.async_new_records_since(records, key)
+        else:
+            new_records = self.incremental.new_records(records, key)
+        added = "None."
+        if new_records:
+            added = await self._async_encode(join_records(new_records, is_json))
+        context = (
+            f"Summary of the earlier records:\n{self.incremental.summary or 'None yet.'}\n\n"
+            f"Records added since:\n{added}"
+        )
+        if not new_records:
+            return await self._async_answer_content(prompt, context)
+
+        _LOGGER.debug(f"Sending {len(new_records)} new records with the rolling summary")
+        answer, summary = await asyncio.gather(
+            self._async_answer_content(prompt, context),
+            self._async_ask(
+                f"{DEFAULT_SUMMARY_PROMPT} {prompt}", context, stream=False, final=False
+            ),
+        )
+        if summary.strip():
+            await self.incremental.async_update(records, summary.strip(), from_recorder)
+        else:
+            # Keep the previous summary so these records are sent again next run
+            _LOGGER.warning("The rolling summary came back empty, keeping the previous one")
+        return answer
+
+    async def _async_answer_content(self, prompt, content):
+        """Answer the prompt over the content, chunking it when enabled."""
+        if self.config.get(CONF_CHUNKED, DEFAULT_CHUNKED):
+            max_chars = self.config.get(CONF_CHUNK_TOKENS, DEFAULT_CHUNK_TOKENS) * CHARS_PER_TOKEN
+            chunks = chunk_records(split_records(content), max_chars)
+            if len(chunks) > 1:
+                return await self._async_map_reduce(prompt, chunks)
+
+        return await self._async_ask(prompt, content)
+
+    async def _async_map_reduce(self, prompt, chunks):
+        """Summarise every chunk in parallel, then answer over the summaries."""
+        semaphore = asyncio.Semaphore(
+            self.config.get(CONF_MAX_PARALLEL, DEFAULT_MAX_PARALLEL)
+        )
+        map_prompt = f"{DEFAULT_MAP_PROMPT} {prompt}"
+
+        async def async_map(chunk):
+            async with semaphore:
+                return await self._async_ask(map_prompt, chunk, stream=False, final=False)
+
+        _LOGGER.debug(f"Running map prompt over {len(chunks)} chunks")
+        partials = await asyncio.gather(*(async_map(chunk) for chunk in chunks))
+        notes = "\n".join(
+            f"Part {index}: {partial.strip()}"
+            for index, partial in enumerate(partials, 1)
+            if partial.strip()
+        )
+        return await self._async_ask(
+            prompt, notes, "Here are notes taken from each part of the content:"
+        )
+
+    async def _async_ask(self, instructions, content, header=CONTENT_HEADER, **kwargs):
+        """Generate over instructions and content.
+
+        With prefix caching the instructions are sent as the system prompt,
+        so every request starts with the same tokens and Ollama only
+        evaluates the content that follows them.
+        """
+        if self.config.get(CONF_PREFIX_CACHE, DEFAULT_PREFIX_CACHE):
+            return await self._async_generate(
+                f"{header}\n{content}", system=ensure_single_line(instructions), **kwargs
+            )
+        return await self._async_generate(build_prompt(instructions, content, header), **kwargs)
+
+    def _validate(self, text):
+        """Return why an answer fails the cascade validators, or None if it passes."""
+        validators = self.config.get(CONF_CASCADE_VALIDATORS, DEFAULT_CASCADE_VALIDATORS)
+        text = text.strip()
+        if VALIDATOR_NOT_EMPTY in validators and not text:
+            return "empty answer"
+        result = parse_result(text) if self.output_format else None
+        if VALIDATOR_STRUCTURED in validators and self.output_format and result is None:
+            return "answer is not valid JSON"
+        if VALIDATOR_FITS_HELPER in validators:
+            shown = format_result(result) if result is not None else text
+            if len(shown) > self.helper_max_length:
+                return f"answer is longer than {self.helper_max_length} characters"
+        return None
+
+    async def _async_generate(self, prompt, stream=None, body=None, final=True, system=None):
+        """Send one prompt to Ollama and return the generated text.
+
+        Only the final answer gets the output budget, stop sequences and
+        format, and goes through the model cascade: each model is tried in
+        turn until one gives an answer that passes the validators. The last
+        model's answer is always accepted. Intermediate summaries are sent to
+        the main model without any of this.
+        """
+        if not final:
+            return await self._async_generate_model(self.model, prompt, stream, body, final, system)
+
+        models = self.models
+        for model in models:
+            last = model == models[-1]
+            try:
+                text = await self._async_generate_model(model, prompt, stream, body, final, system)
+                failure = None if last else self._validate(text)
+            except OllamaError as e:
+                if last:
+                    self._record_cascade(model, False)
+                    raise
+                failure = str(e)
+            self._record_cascade(model, failure is None)
+            if failure is None:
+                self._answer_model = model
+                return text
+            _LOGGER.debug(f"Escalating from model {model}: {failure}")
+            # A rejected answer must not be published if the run is cut short
+            self._partial = ""
+
+    def _record_cascade(self, model, accepted):
+        """Count a final answer asked from a model when a cascade is configured."""
+        if len(self.models) < 2:
+            return
+        stats = self.cascade.setdefault(model, {"attempts": 0, "accepted": 0})
+        stats["attempts"] += 1
+        stats["accepted"] += accepted
+
+    async def _async_generate_model(self, model, prompt, stream=None, body=None, final=True, system=None):
+        """Send one prompt to one model and return the generated text.
+
+        A final answer with a system prompt goes to the server that last
+        evaluated the same system prompt for this model, if it is healthy.
+        """
+        payload = {"model": model, "prompt": prompt}
+        preferred = on_success = None
+        if system is not None:
+            payload["system"] = system
+            if final and self.prefix is not None:
+                key = cache_key(system, model)
+                preferred = self.prefix.backend(model, key)
+                on_success = partial(self.prefix.async_update, model, key)
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        if final:
+            payload.update(self._answer_options())
+        if stream is None:
+            # Final answers are streamed under a deadline so there is a partial answer to publish
+            stream = self.config.get(CONF_STREAM, DEFAULT_STREAM) or (final and self.has_deadline)
+        if stream:
+            return await self._async_request(
+                lambda client: self._async_generate_stream(client, payload, body, final),
+                preferred,
+                on_success,
+            )
+        result = await self._async_request(
+            lambda client: client.async_generate(payload, body), preferred, on_success
+        )
+        self._record_timings(result)
+        return result.get("response", "")
+
+    async def _async_generate_stream(self, client, payload, body=None, final=True):
+        """Stream a generation, publishing throttled partial results when streaming is enabled.
+
+        Raises OllamaError when no token arrives within the first-token
+        deadline, so the request fails over to the next server.
+        """
+        first_token_timeout = self.config.get(CONF_FIRST_TOKEN_TIMEOUT, DEFAULT_FIRST_TOKEN_TIMEOUT)
+        publish = self.config.get(CONF_STREAM, DEFAULT_STREAM)
+        text = ""
+        if final:
+            # Drop what a server that failed over streamed
+            self._partial = ""
+        last_update = 0.0
+        chunks = client.async_generate_stream(payload, body)
+        try:
+            while True:
+                try:
+                    if first_token_timeout and not text:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), first_token_timeout)
+                    else:
+                        chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError as e:
+                    raise OllamaError(
+                        f"No token from {client.base_url} within {first_token_timeout} seconds"
+                    ) from e
+                text += chunk.get("response", "")
+                if final:
+                    self._partial = text
+                if chunk.get("done"):
+                    self._record_timings(chunk)
+                now = time.monotonic()
+                if publish and text.strip() and now - last_update >= STREAM_UPDATE_INTERVAL:
+                    last_update = now
+                    self.async_write_helper(text.strip())
+                    self.hass.bus.async_fire(
+                        EVENT_PARTIAL, {"entry_id": self.entry.entry_id, "response": text}
+                    )
+        finally:
+            await chunks.aclose()
+        return text
+
+    def async_write_helper(self, value, extra_attributes=None):
+        """Write a value to the configured helper entity's state."""
+        helper_entity = self.config.get(CONF_HELPER_ENTITY)
+        if not helper_entity:
+            return
+        current = self.hass.states.get(helper_entity)
+        attributes = current.attributes if current else None
+        if extra_attributes:
+            attributes = {**(attributes or {}), **extra_attributes}
+        self.hass.states.async_set(
+            helper_entity, value[:MAX_LENGTH_STATE_STATE], attributes
+        )
+
+
+class File2promptJobRunner(File2promptRunner):
+    """Run one job of a batch with an entry's server, model and options.
+
+    The job's input file, prompt and helper replace those of the entry.
+    Incremental mode is off because the rolling summary belongs to the
+    entry's own input file. Jobs are reported by the batch result event
+    only, so they do not show up as runs of the entry.
+    """
+
+    reports_runs = False
+
+    def __init__(self, runner: File2promptRunner, input_file, prompt=None, helper_entity=None):
+        """Initialize the job runner."""
+        super().__init__(runner.hass, runner.entry, runner.cache, None, runner.pool)
+        self.cascade = runner.cascade
+        self._overrides = {
+            CONF_INPUT_FILE: input_file,
+            CONF_SOURCE: SOURCE_FILE,
+            CONF_HELPER_ENTITY: helper_entity,
+            CONF_INCREMENTAL: False,
+        }
+        if prompt:
+            # The job's own prompt replaces the entry's prompt template too
+            self._overrides[CONF_PROMPT] = prompt
+            self._overrides[CONF_PROMPT_TEMPLATE] = DEFAULT_PROMPT_TEMPLATE
+
+    @property
+    def config(self):
+        """Return the entry configuration with the job's overrides."""
+        return {**self.entry.data, **self._overrides}
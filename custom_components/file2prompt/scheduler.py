@@ -0,0 +1,175 @@
+"""Job scheduler for File2prompt runs."""
+import asyncio
+import heapq
+import itertools
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Job:
+    """A queued or running run of one config entry."""
+
+    def __init__(self, runner, priority, future):
+        """Initialize the job."""
+        self.runner = runner
+        self.priority = priority
+        self.future = future
+        self.started = False
+        self.cancelled = False
+        # Run queued behind this one once it has started
+        self.follow_up = None
+
+
+class File2promptScheduler:
+    """Queue entry runs, coalesce duplicates and limit concurrency per Ollama server.
+
+    Every entry has at most one job: triggering an entry that is already
+    queued or running returns the pending job instead of starting another.
+    A trigger that must see newer input, like a change of the input file,
+    instead queues one follow-up run behind a job that has already started.
+    Queued jobs start in priority order (highest first, then FIFO) on one
+    of their entry's servers that has a free slot. Servers are told apart
+    by their normalised host:port address, so every entry that uses a
+    server shares its slots.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._jobs = {}
+        self._queue = []
+        self._running = set()
+        self._order = itertools.count()
+
+    def async_submit(self, runner, priority=0, follow_up=False):
+        """Queue a run of the runner's entry and return a future with its result.
+
+        With follow_up, a job that has already started (and so may have read
+        older input) is not reused; one more run is queued to start after it.
+        """
+        entry_id = runner.entry.entry_id
+        job = self._jobs.get(entry_id)
+        if job is not None and job.started and follow_up:
+            if job.follow_up is None:
+                _LOGGER.debug(f"Queueing a follow-up run of {entry_id} behind the running job")
+                job.follow_up = _Job(runner, priority, self.hass.loop.create_future())
+            job.follow_up.priority = max(job.follow_up.priority, priority)
+            return job.follow_up.future
+        if job is not None:
+            _LOGGER.debug(f"Coalescing run of {entry_id} with the pending job")
+            if not job.started and priority > job.priority:
+                job.priority = priority
+                self._async_enqueue(job)
+            return job.future
+
+        job = _Job(runner, priority, self.hass.loop.create_future())
+        self._jobs[entry_id] = job
+        self._async_enqueue(job)
+        return job.future
+
+    def async_submit_job(self, runner, priority=0):
+        """Queue one job of a batch and return a future with its result.
+
+        Batch jobs are never coalesced, but take the same server slots as runs.
+        """
+        job = _Job(runner, priority, self.hass.loop.create_future())
+        self._async_enqueue(job)
+        return job.future
+
+    @callback
+    def async_cancel(self, runner):
+        """Cancel the queued or running job of the runner's entry.
+
+        A queued job is dropped and resolves to None, a running job publishes
+        the answer streamed so far and its follow-up run is dropped. Return
+        False when the entry has no job.
+        """
+        job = self._jobs.get(runner.entry.entry_id)
+        if job is None:
+            return False
+        if job.started:
+            if job.follow_up is not None:
+                job.follow_up.future.set_result(None)
+                job.follow_up = None
+            return job.runner.async_cancel()
+        job.cancelled = True
+        self._jobs.pop(runner.entry.entry_id)
+        job.future.set_result(None)
+        _LOGGER.debug(f"Dropped the queued run of {runner.entry.entry_id}")
+        return True
+
+    def _async_enqueue(self, job):
+        """Put a job on the queue and start whatever can run."""
+        heapq.heappush(self._queue, (-job.priority, next(self._order), job))
+        self._async_start_jobs()
+
+    def _free_server(self, runner, busy):
+        """Return the address of a server of the runner with a free slot, or None.
+
+        A server is full once as many runs use it as the lowest limit of the
+        entries running there and the runner's own entry allow. The server
+        holding the entry's prompt prefix is tried first.
+        """
+        backends = runner.pool.select(runner.backends, runner.prefix_server)
+        if any(backend.healthy for backend in backends):
+            backends = [backend for backend in backends if backend.healthy]
+        for backend in backends:
+            if backend.address in busy:
+                continue
+            running = [job.runner for job in self._running if job.runner.server == backend.address]
+            limit = min(other.server_concurrency for other in running + [runner])
+            if len(running) < limit:
+                return backend.address
+        return None
+
+    def _async_start_jobs(self):
+        """Start queued jobs while their servers have free slots."""
+        # Servers a waiting job could use, kept for it so that lower
+        # priority jobs do not take their next free slot
+        busy = set()
+        waiting = []
+        while self._queue:
+            item = heapq.heappop(self._queue)
+            priority, _, job = item
+            if job.started or job.cancelled or -priority != job.priority:
+                # Stale heap item left behind by a priority bump or a cancellation
+                continue
+            server = self._free_server(job.runner, busy)
+            if server is None:
+                busy.update(job.runner.pool.get(address).address for address in job.runner.backends)
+                waiting.append(item)
+                continue
+            job.started = True
+            job.runner.server = server
+            self._running.add(job)
+            self.hass.async_create_task(self._async_run(job))
+        for item in waiting:
+            heapq.heappush(self._queue, item)
+
+    async def _async_run(self, job):
+        """Run a job and hand its slot to the next one."""
+        try:
+            job.future.set_result(await job.runner.async_run())
+        except asyncio.CancelledError:
+            # The run was cancelled, e.g. on shutdown: release everyone waiting on it
+            job.future.cancel()
+            if job.follow_up is not None:
+                job.follow_up.future.cancel()
+                job.follow_up = None
+            raise
+        except Exception as e:
+            job.future.set_exception(e)
+        finally:
+            self._running.discard(job)
+            job.runner.server = None
+            entry_id = job.runner.entry.entry_id
+            if job.follow_up is not None:
+                self._jobs[entry_id] = job.follow_up
+                self._async_enqueue(job.follow_up)
+            else:
+                if self._jobs.get(entry_id) is job:
+                    self._jobs.pop(entry_id)
+                self._async_start_jobs()
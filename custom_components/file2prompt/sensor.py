@@ -0,0 +1,219 @@
+"""Run telemetry sensors for the File2prompt integration."""
+import logging
+
+from homeassistant.components.sensor import (
+    RestoreSensor,
+    SensorEntity,
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import PERCENTAGE, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import (
+    DOMAIN,
+    SIGNAL_RUN_COMPLETE,
+    RESULT_SUMMARY_LENGTH,
+    RESULT_UNRECORDED_ATTRIBUTES,
+)
+from .results import summarize
+
+_LOGGER = logging.getLogger(__name__)
+
+# Keys match the fields of a run record
+SENSORS = (
+    SensorEntityDescription(
+        key="latency",
+        name="Latency",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="load_duration",
+        name="Model load time",
+        icon="mdi:timer-sand",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="prompt_eval_count",
+        name="Prompt tokens",
+        icon="mdi:text-box-outline",
+        native_unit_of_measurement="tokens",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="eval_count",
+        name="Generated tokens",
+        icon="mdi:text-box-edit-outline",
+        native_unit_of_measurement="tokens",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="tokens_per_second",
+        name="Tokens per second",
+        icon="mdi:speedometer",
+        native_unit_of_measurement="tokens/s",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="cache_hits",
+        name="Cache hits",
+        icon="mdi:cached",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="cache_misses",
+        name="Cache misses",
+        icon="mdi:cached",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+)
+
+CASCADE_SENSOR = SensorEntityDescription(
+    key="cascade_hit_rate",
+    name="Cascade hit rate",
+    icon="mdi:stairs-up",
+    native_unit_of_measurement=PERCENTAGE,
+    state_class=SensorStateClass.MEASUREMENT,
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the telemetry and result sensors of an entry."""
+    runner = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(
+        [File2promptRunSensor(entry, description) for description in SENSORS]
+        + [
+            File2promptCascadeSensor(entry, CASCADE_SENSOR, runner),
+            File2promptResultSensor(entry, runner.results),
+        ]
+    )
+
+
+def _device_info(entry: ConfigEntry):
+    """Return the device grouping the sensors of an entry."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=entry.title,
+        manufacturer="File2prompt",
+    )
+
+
+class File2promptRunSensor(RestoreSensor):
+    """Report one field of the last run of an entry."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, entry: ConfigEntry, description: SensorEntityDescription):
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_device_info = _device_info(entry)
+
+    async def async_added_to_hass(self):
+        """Restore the last value and follow new runs."""
+        await super().async_added_to_hass()
+        if (last := await self.async_get_last_sensor_data()) is not None:
+            self._attr_native_value = last.native_value
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_RUN_COMPLETE.format(self._entry.entry_id),
+                self._async_run_complete,
+            )
+        )
+
+    @callback
+    def _async_run_complete(self, record):
+        """Update from a finished run; fields the run did not report keep their value."""
+        if self.entity_description.key in record:
+            self._attr_native_value = record[self.entity_description.key]
+            self.async_write_ha_state()
+
+
+class File2promptCascadeSensor(File2promptRunSensor):
+    """Report how often the first cascade model's answer was accepted.
+
+    The hit rates of every cascade model are attributes.
+    """
+
+    def __init__(self, entry: ConfigEntry, description: SensorEntityDescription, runner):
+        """Initialize the sensor."""
+        super().__init__(entry, description)
+        self._runner = runner
+
+    @property
+    def extra_state_attributes(self):
+        """Return the attempts, accepted answers and hit rate per model."""
+        if not self._runner.cascade:
+            return None
+        return {
+            model: {**stats, "hit_rate": round(100 * stats["accepted"] / stats["attempts"], 1)}
+            for model, stats in self._runner.cascade.items()
+        }
+
+
+class File2promptResultSensor(SensorEntity):
+    """Show the last answer of an entry.
+
+    The state is a short summary; the full answer, its parsed result and the
+    earlier answers are attributes that are not written to the recorder.
+    """
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_name = "Result"
+    _attr_icon = "mdi:message-text-outline"
+    _unrecorded_attributes = RESULT_UNRECORDED_ATTRIBUTES
+
+    def __init__(self, entry: ConfigEntry, results):
+        """Initialize the sensor."""
+        self._entry = entry
+        self._results = results
+        self._attr_unique_id = f"{entry.entry_id}_result"
+        self._attr_device_info = _device_info(entry)
+
+    @property
+    def native_value(self):
+        """Return the summary of the last answer."""
+        if (latest := self._results.latest) is None:
+            return None
+        return summarize(latest["response"], RESULT_SUMMARY_LENGTH)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the full last answer and the earlier ones, newest first."""
+        if (latest := self._results.latest) is None:
+            return None
+        return {
+            **latest,
+            "history": list(reversed(self._results.results)),
+        }
+
+    async def async_added_to_hass(self):
+        """Follow new runs."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_RUN_COMPLETE.format(self._entry.entry_id),
+                self._async_run_complete,
+            )
+        )
+
+    @callback
+    def _async_run_complete(self, record):
+        """Show the answer of a finished run."""
+        self.async_write_ha_state()
@@ -0,0 +1,95 @@
+"""Shared registry of named prompt templates."""
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import TemplateError
+from homeassistant.helpers.event import TrackTemplate, async_track_template_result
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.template import Template
+
+from .const import (
+    DOMAIN,
+    STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PromptTemplates:
+    """Named Jinja prompt templates, persisted under .storage.
+
+    A template is compiled and rendered the first time a run uses it and is
+    then tracked: it is only rendered again when a state it references
+    changes, so runs read the last rendered prompt.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the registry."""
+        self.hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.templates")
+        self._sources = {}
+        self._rendered = {}
+        self._trackers = {}
+
+    @property
+    def names(self):
+        """Return the names of the stored templates."""
+        return sorted(self._sources)
+
+    async def async_load(self):
+        """Load the templates from storage."""
+        data = await self._store.async_load() or {}
+        self._sources = data.get("templates", {})
+
+    def async_stop(self):
+        """Stop tracking the rendered templates."""
+        for name in list(self._trackers):
+            self._async_invalidate(name)
+
+    async def async_set(self, name, source):
+        """Add or replace a template."""
+        self._sources[name] = source
+        self._async_invalidate(name)
+        await self._store.async_save({"templates": self._sources})
+
+    async def async_remove(self, name):
+        """Delete a template."""
+        self._sources.pop(name, None)
+        self._async_invalidate(name)
+        await self._store.async_save({"templates": self._sources})
+
+    @callback
+    def async_render(self, name):
+        """Return the rendered template, or None if there is no such template."""
+        if name not in self._sources:
+            return None
+        if name not in self._trackers:
+            self._async_track(name)
+        return self._rendered.get(name)
+
+    @callback
+    def _async_track(self, name):
+        """Render a template and re-render it when its dependencies change."""
+
+        @callback
+        def _async_result(event, updates):
+            result = updates.pop().result
+            if isinstance(result, TemplateError):
+                _LOGGER.error(f"Failed to render prompt template {name}: {result}")
+                return
+            _LOGGER.debug(f"Rendered prompt template {name}")
+            self._rendered[name] = str(result)
+
+        template = Template(self._sources[name], self.hass)
+        tracker = async_track_template_result(
+            self.hass, [TrackTemplate(template, None)], _async_result
+        )
+        tracker.async_refresh()
+        self._trackers[name] = tracker
+
+    @callback
+    def _async_invalidate(self, name):
+        """Forget the rendered template and stop tracking it."""
+        self._rendered.pop(name, None)
+        if (tracker := self._trackers.pop(name, None)) is not None:
+            tracker.async_remove()
@@ -0,0 +1,119 @@
+"""Run an entry automatically when its input file changes."""
+from datetime import timedelta
+import logging
+import os
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+
+from .cache import hash_file
+from .const import WATCH_POLL_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+
+def stat_file(path):
+    """Return the modification time and size of a file, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class InputFileWatcher:
+    """Watch a file with kernel notifications, falling back to stat polling.
+
+    Bursts of changes are debounced into one callback, and the callback is
+    skipped when the file content hash did not change.
+    """
+
+    def __init__(self, hass: HomeAssistant, path, debounce, action):
+        """Initialize the watcher."""
+        self.hass = hass
+        self.path = os.path.abspath(path)
+        self.debounce = debounce
+        self.action = action
+        self._observer = None
+        self._unsub_poll = None
+        self._unsub_debounce = None
+        self._last_hash = None
+        self._last_stat = None
+
+    async def async_start(self):
+        """Start watching the file."""
+        self._last_hash = await self.hass.async_add_executor_job(hash_file, self.path)
+        self._last_stat = await self.hass.async_add_executor_job(stat_file, self.path)
+
+        if Observer is not None:
+            try:
+                self._observer = await self.hass.async_add_executor_job(self._start_observer)
+                _LOGGER.debug(f"Watching {self.path} with file notifications")
+                return
+            except OSError as e:
+                _LOGGER.warning(f"File notifications unavailable for {self.path}, polling instead: {e}")
+
+        self._unsub_poll = async_track_time_interval(
+            self.hass, self._async_poll, timedelta(seconds=WATCH_POLL_INTERVAL)
+        )
+
+    async def async_stop(self):
+        """Stop watching the file."""
+        if self._unsub_debounce:
+            self._unsub_debounce()
+            self._unsub_debounce = None
+        if self._unsub_poll:
+            self._unsub_poll()
+            self._unsub_poll = None
+        if self._observer:
+            observer = self._observer
+            self._observer = None
+            observer.stop()
+            await self.hass.async_add_executor_job(observer.join)
+
+    def _start_observer(self):
+        """Start a watchdog observer on the file's directory."""
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            """Forward events for the watched file to the event loop."""
+
+            def on_any_event(self, event):
+                paths = {event.src_path, getattr(event, "dest_path", None)}
+                if watcher.path in paths:
+                    watcher.hass.loop.call_soon_threadsafe(watcher.async_changed)
+
+        observer = Observer()
+        observer.schedule(Handler(), os.path.dirname(self.path), recursive=False)
+        observer.start()
+        return observer
+
+    async def _async_poll(self, *_):
+        """Check the file's modification time and size."""
+        stat = await self.hass.async_add_executor_job(stat_file, self.path)
+        if stat != self._last_stat:
+            self._last_stat = stat
+            self.async_changed()
+
+    @callback
+    def async_changed(self):
+        """Restart the debounce window after a change."""
+        if self._unsub_debounce:
+            self._unsub_debounce()
+        self._unsub_debounce = async_call_later(self.hass, self.debounce, self._async_settled)
+
+    async def _async_settled(self, *_):
+        """Run the action if the content changed since the last run."""
+        self._unsub_debounce = None
+        file_hash = await self.hass.async_add_executor_job(hash_file, self.path)
+        if file_hash is None or file_hash == self._last_hash:
+            return
+        self._last_hash = file_hash
+        _LOGGER.debug(f"{self.path} changed, starting a run")
+        await self.action()